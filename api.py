@@ -8,7 +8,11 @@ from flask import Flask, request, jsonify, session
 from flask_cors import CORS
 import sys
 import os
+import logging
 from functools import wraps
+from utils.logging_setup import setup_logging
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -288,10 +292,8 @@ def search_recipes():
     # get user_id from session if logged in (for dietary restriction filtering)
     user_id = get_current_user_id()
     
-    print(f"\n🔍 Recipe search request:")
-    print(f"   User ID: {user_id or 'Not logged in'}")
-    print(f"   Ingredients: {ingredient_names}")
-    print(f"   Filters: {filters}")
+    logger.debug("Recipe search request: user=%s ingredients=%s filters=%s",
+                 user_id or 'Not logged in', ingredient_names, filters)
     
     # pass user_id to enable automatic dietary restriction filtering
     search_results = query_recipes_by_ingredients(ingredient_names, filters, user_id=user_id)
@@ -302,8 +304,7 @@ def search_recipes():
         filtered = search_results.get('filtered', [])
         dietary_restrictions = search_results.get('dietary_restrictions', [])
         
-        print(f"   Compatible results: {len(compatible)} recipes")
-        print(f"   Filtered results: {len(filtered)} recipes")
+        logger.debug("Recipe search: %d compatible, %d filtered", len(compatible), len(filtered))
         
         # log search if user is logged in
         if user_id:
@@ -318,7 +319,7 @@ def search_recipes():
         }), 200
     else:
         # old format compatibility
-        print(f"   Results: {len(search_results)} recipes found")
+        logger.debug("Recipe search: %d recipes found", len(search_results))
         
         if user_id:
             handle_log_recipe_search(user_id, ingredient_names, filters, len(search_results))
@@ -328,6 +329,20 @@ def search_recipes():
             'count': len(search_results)
         }), 200
 
+@app.route('/api/recipes/matches', methods=['GET'])
+@login_required
+def get_recipe_matches():
+    # best-matching recipes for the current user's pantry
+    user_id = get_current_user_id()
+    # non-numeric top_n falls back to the default; the rest is clamped to 1-50
+    top_n = min(max(request.args.get('top_n', 10, type=int), 1), 50)
+    matches = query_top_recipe_matches(user_id, top_n)
+    
+    return jsonify({
+        'matches': matches,
+        'count': len(matches)
+    }), 200
+
 @app.route('/api/recipes/<recipe_id>', methods=['GET'])
 def get_recipe(recipe_id):
     # get recipe details (public endpoint)
@@ -444,10 +459,8 @@ def get_smart_shopping_suggestions():
     # normalize ingredients to lowercase
     user_ingredients = [ing.lower().strip() for ing in user_ingredients]
     
-    print(f"\n Smart Shopping Suggestions Request:")
-    print(f"   User ingredients: {user_ingredients}")
-    print(f"   Filters: {filters}")
-    print(f"   Top N: {top_n}")
+    logger.debug("Smart shopping suggestions request: ingredients=%s filters=%s top_n=%d",
+                 user_ingredients, filters, top_n)
     
     # load all recipes
     try:
@@ -461,8 +474,6 @@ def get_smart_shopping_suggestions():
             
             # Get ALL recipes directly from database
             # Don't use query_recipes_by_ingredients with empty list - it returns nothing!
-            print(f"   Fetching all recipes from database...")
-            
             base_query = """
                 SELECT DISTINCT r.r_id as id, r.name, r.time as total_time, 
                        r.skill as skill_level, r."desc" as cuisine
@@ -489,7 +500,7 @@ def get_smart_shopping_suggestions():
             
             recipes_raw = execute_query(base_query, tuple(params), fetch_all=True)
             
-            print(f"   Found {len(recipes_raw or [])} recipes in database")
+            logger.debug("Found %d recipes in database", len(recipes_raw or []))
             
             # Now fetch full recipe data including ingredient lists
             all_recipes = []
@@ -505,7 +516,7 @@ def get_smart_shopping_suggestions():
                         'cuisine': recipe_full.get('cuisine', 'unknown')
                     })
             
-            print(f"   Loaded full data for {len(all_recipes)} recipes")
+            logger.debug("Loaded full data for %d recipes", len(all_recipes))
             
             # also search with user ingredients to get current matches
             from queries.query_handlers import query_recipes_by_ingredients
@@ -517,35 +528,23 @@ def get_smart_shopping_suggestions():
         else:
             # fallback to recipes.json
             from services.recipe_matcher import load_recipes
-            all_recipes_raw = load_recipes()
             
-            # convert to format expected by suggestion_engine
-            all_recipes = []
-            for r in all_recipes_raw:
-                all_recipes.append({
-                    'id': r['id'],
-                    'name': r['name'],
-                    'ingredients': r['ingredients'],
-                    'total_time': r.get('total_time', 0),
-                    'skill_level': r.get('skill_level', 'beginner'),
-                    'cuisine': r.get('cuisine', 'unknown')
-                })
+            # the shared catalogue already has every field suggestion_engine reads,
+            # plus the cached lowercased fields, so it's used as-is (not copied)
+            all_recipes = load_recipes()
             
             # get current matches
-            current_matches = search_recipes(user_ingredients, all_recipes_raw, filters)
+            current_matches = search_recipes(user_ingredients, all_recipes, filters)
         
         # filter out recipes the user can already make perfectly (100% match)
         exclude_ids = set([r['id'] for r in current_matches if r.get('match_percentage', 0) == 100])
         
-        print(f"   Total recipes available: {len(all_recipes)}")
-        print(f"   Current matches: {len(current_matches)}")
-        print(f"   Perfect matches (excluded): {len(exclude_ids)}")
-        
         # determine if user has any matches
         has_matches = len(current_matches) > 0
         
-        print(f"   Has matches: {has_matches}")
-        print(f"   Strategy: {'close_recipes (50%+ matches)' if has_matches else 'fresh_start (all recipes)'}")
+        logger.debug("Suggestions: %d recipes, %d current matches, %d perfect (excluded), strategy=%s",
+                     len(all_recipes), len(current_matches), len(exclude_ids),
+                     'close_recipes' if has_matches else 'fresh_start')
         
         # generate suggestions
         suggestions = generate_shopping_suggestions(
@@ -557,12 +556,12 @@ def get_smart_shopping_suggestions():
             exclude_ids=exclude_ids
         )
         
-        print(f"   Raw suggestions count: {len(suggestions)}")
+        logger.debug("Raw suggestions count: %d", len(suggestions))
         
         # If no suggestions with has_matches=True, try again with has_matches=False
         # This handles the case where user has some matches but they're all perfect
         if len(suggestions) == 0 and has_matches:
-            print(f"   No suggestions with close_recipes strategy, trying fresh_start...")
+            logger.debug("No suggestions with close_recipes strategy, trying fresh_start")
             suggestions = generate_shopping_suggestions(
                 user_ingredients=user_ingredients,
                 recipes=all_recipes,
@@ -579,14 +578,11 @@ def get_smart_shopping_suggestions():
             recipes=all_recipes,
             filters=filters,
             min_match_threshold=50,
-            exclude_ids=exclude_ids
+            exclude_ids=exclude_ids,
+            top_n=5  # only the top 5 partial matches are shown
         )
         
-        # limit to top 5 partial matches
-        partial_matches = partial_matches[:5]
-        
-        print(f"   Suggestions generated: {len(suggestions)}")
-        print(f"   Partial matches: {len(partial_matches)}")
+        logger.debug("Suggestions generated: %d, partial matches: %d", len(suggestions), len(partial_matches))
         
         # determine strategy used
         strategy = "close_recipes" if has_matches else "fresh_start"
@@ -601,9 +597,7 @@ def get_smart_shopping_suggestions():
         }), 200
         
     except Exception as e:
-        print(f" Error generating suggestions: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error generating suggestions")
         return jsonify({
             'success': False,
             'error': str(e),
@@ -800,6 +794,10 @@ def health_check():
 # ============================================================================
 
 if __name__ == '__main__':
+    # log through a background queue so request handlers never block on stderr
+    # (only when run as the server, so importing the app starts no listener thread)
+    setup_logging()
+    
     print("\n" + "=" * 70)
     print(" SmartFridge API Starting")
     if USE_DATABASE:
@@ -1,13 +1,16 @@
 # Authentication Command Handlers for User Profile System
 # Handles user registration, login, and profile management
 
-import uuid
 import hashlib
 from typing import Dict, Any, Optional
 from database.db_connection import execute_update, execute_query
+from utils.fast_uuid import new_uuid4_str
 from events.event_bus import get_event_bus
 from events.domain_events import UserCreatedEvent, UserProfileUpdatedEvent
 
+# bound once at import; handlers publish straight to the singleton
+event_bus = get_event_bus()
+
 def hash_password(password: str) -> str:
     # hash password using SHA-256 (in production, use bcrypt)
     return hashlib.sha256(password.encode()).hexdigest()
@@ -27,7 +30,6 @@ def handle_register_user(username: str, password: str) -> Dict[str, Any]:
     Returns:
         Result dict with success status and user_id or error message
     """
-    event_bus = get_event_bus()
     
     # validation
     if not username or len(username) < 3:
@@ -44,7 +46,7 @@ def handle_register_user(username: str, password: str) -> Dict[str, Any]:
         return {'success': False, 'message': 'Username already taken'}
     
     # create user
-    user_id = str(uuid.uuid4())
+    user_id = new_uuid4_str()
     password_hash = hash_password(password)
     
     insert_query = """
@@ -189,7 +191,6 @@ def handle_get_user_equipment(user_id: str) -> Dict[str, Any]:
 
 def handle_update_user_dietary_restrictions(user_id: str, dietary_restrictions: list) -> Dict[str, Any]:
     # update user's dietary restrictions
-    event_bus = get_event_bus()
     
     # update in database
     diet_str = ','.join(dietary_restrictions) if dietary_restrictions else None
@@ -207,7 +208,6 @@ def handle_update_user_dietary_restrictions(user_id: str, dietary_restrictions:
 
 def handle_update_user_skill_level(user_id: str, skill_level: str) -> Dict[str, Any]:
     # update user's skill level
-    event_bus = get_event_bus()
     
     # validation
     valid_levels = ['beginner', 'intermediate', 'advanced']
@@ -1,8 +1,8 @@
 # Command Handlers - Write Side of CQRS with PostgreSQL
 # commands change state in database and publish events
 
+from functools import wraps
 from typing import Dict, Any, List
-import uuid
 from events.domain_events import (
     UserCreatedEvent,
     UserProfileUpdatedEvent,
@@ -15,32 +15,44 @@ from events.domain_events import (
 )
 from events.event_bus import get_event_bus
 from database.db_connection import execute_update, execute_query
+from utils.fast_uuid import new_uuid4_str
+
+# bound once at import; handlers publish straight to the singleton
+event_bus = get_event_bus()
+
+def requires_user(handler):
+    # short-circuits handlers for an unknown user_id before any other work
+    @wraps(handler)
+    def wrapper(user_id: str, *args, **kwargs):
+        check_user = "SELECT u_id FROM \"user\" WHERE u_id = %s;"
+        if not execute_query(check_user, (user_id,), fetch_one=True):
+            return {'success': False, 'message': 'User not found'}
+        return handler(user_id, *args, **kwargs)
+    return wrapper
 
 # USER COMMANDS
 
 def handle_create_user(username: str, password: str, dietary_restrictions: List[str] = None) -> Dict[str, Any]:
     # creates a new user in PostgreSQL
-    event_bus = get_event_bus()
     
     # validation
     if not username or not password:
         return {'success': False, 'message': 'Username and password required'}
     
-    # check if user exists
-    check_query = "SELECT u_id FROM \"user\" WHERE username = %s;"
-    existing = execute_query(check_query, (username,), fetch_one=True)
-    if existing:
-        return {'success': False, 'message': 'Username already exists'}
-    
-    # create user
-    user_id = str(uuid.uuid4())
+    # create user; the UNIQUE index on username does the existence check
+    # in the same round trip (no separate SELECT scan first)
+    user_id = new_uuid4_str()
     diet_str = ','.join(dietary_restrictions) if dietary_restrictions else None
     
     insert_query = """
         INSERT INTO "user" (u_id, username, password, diet, skill)
-        VALUES (%s, %s, %s, %s, %s);
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (username) DO NOTHING;
     """
-    execute_update(insert_query, (user_id, username, password, diet_str, 'beginner'))
+    rows = execute_update(insert_query, (user_id, username, password, diet_str, 'beginner'))
+    
+    if rows == 0:
+        return {'success': False, 'message': 'Username already exists'}
     
     # publish event
     event = UserCreatedEvent(user_id, username, dietary_restrictions or [])
@@ -52,14 +64,9 @@ def handle_create_user(username: str, password: str, dietary_restrictions: List[
         'message': f'User {username} created successfully'
     }
 
+@requires_user
 def handle_update_user_profile(user_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
     # updates user profile in PostgreSQL
-    event_bus = get_event_bus()
-    
-    # validation
-    check_query = "SELECT u_id FROM \"user\" WHERE u_id = %s;"
-    if not execute_query(check_query, (user_id,), fetch_one=True):
-        return {'success': False, 'message': 'User not found'}
     
     # allowed fields
     allowed_fields = {'dietary_restrictions': 'diet', 'skill_level': 'skill'}
@@ -88,15 +95,11 @@ def handle_update_user_profile(user_id: str, updates: Dict[str, Any]) -> Dict[st
 
 # INGREDIENT COMMANDS
 
+@requires_user
 def handle_add_ingredient(user_id: str, ingredient_name: str, amount: float = 1.0, exp_date: str = None) -> Dict[str, Any]:
     # adds ingredient to user's pantry in PostgreSQL
-    event_bus = get_event_bus()
     
     # validation
-    check_user = "SELECT u_id FROM \"user\" WHERE u_id = %s;"
-    if not execute_query(check_user, (user_id,), fetch_one=True):
-        return {'success': False, 'message': 'User not found'}
-    
     if not ingredient_name:
         return {'success': False, 'message': 'Ingredient name required'}
     
@@ -135,7 +138,6 @@ def handle_add_ingredient(user_id: str, ingredient_name: str, amount: float = 1.
 
 def handle_remove_ingredient(user_id: str, ingredient_id: str) -> Dict[str, Any]:
     # remove ingredient from user's pantry in PostgreSQL
-    event_bus = get_event_bus()
     
     # try to delete
     delete_query = "DELETE FROM has_ingredient WHERE u_id = %s AND i_id = %s;"
@@ -154,7 +156,6 @@ def handle_remove_ingredient(user_id: str, ingredient_id: str) -> Dict[str, Any]
 
 def handle_favorite_recipe(user_id: str, recipe_id: str, recipe_name: str) -> Dict[str, Any]:
     """Marks recipe as favorite in PostgreSQL"""
-    event_bus = get_event_bus()
     
     # insert favorite (ignore if already exists)
     insert_fav = """
@@ -175,7 +176,6 @@ def handle_favorite_recipe(user_id: str, recipe_id: str, recipe_name: str) -> Di
 
 def handle_unfavorite_recipe(user_id: str, recipe_id: str) -> Dict[str, Any]:
     # removes recipe from favorites in PostgreSQL
-    event_bus = get_event_bus()
     
     delete_fav = "DELETE FROM favorite WHERE u_id = %s AND r_id = %s;"
     rows = execute_update(delete_fav, (user_id, int(recipe_id)))
@@ -193,7 +193,6 @@ def handle_unfavorite_recipe(user_id: str, recipe_id: str) -> Dict[str, Any]:
 
 def handle_update_appliances(user_id: str, appliances: List[str]) -> Dict[str, Any]:
     # updates user's available appliances in PostgreSQL
-    event_bus = get_event_bus()
     
     # clear existing appliances
     delete_query = "DELETE FROM has_app WHERE u_id = %s;"
@@ -229,7 +228,6 @@ def handle_update_appliances(user_id: str, appliances: List[str]) -> Dict[str, A
 
 def handle_log_recipe_search(user_id: str, ingredients: List[str], filters: Dict[str, Any], result_count: int) -> Dict[str, Any]:
     # logs that a recipe search was performed
-    event_bus = get_event_bus()
     
     # publish event (analytics tracking)
     event = RecipeSearchPerformedEvent(user_id, ingredients, filters, result_count)
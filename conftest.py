@@ -0,0 +1,13 @@
+"""
+Root pytest configuration for SmartFridge
+Puts the project root and the legacy CLI ("old main", not a package)
+on the import path once per session
+"""
+import sys
+import pathlib
+
+ROOT = pathlib.Path(__file__).resolve().parent
+# root inserted last so it stays first on the path
+for path in (ROOT / 'old main', ROOT):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
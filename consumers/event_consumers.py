@@ -1,18 +1,74 @@
 # Event Consumers - PostgreSQL Compatible
 # In CQRS with PostgreSQL, events are primarily for logging and analytics
 
+import heapq
+import logging
+import threading
+from collections import deque
 from events.event_bus import get_event_bus
+from events.event_types import EventType
+from database.db_connection import execute_query
+
+logger = logging.getLogger(__name__)
 
 # in-memory analytics storage (ephemeral session data)
+# copy-on-write: a published entry is never mutated in place. writers build a
+# replacement and swap it in with one assignment, so readers (which may be on
+# another thread when the bus runs async) always see a complete, stable value
+# without taking a lock
 _analytics_db = {
     'user_analytics': {},
     'system_stats': {
         'total_searches': 0,
         'total_users_created': 0,
         'total_favorites': 0
-    }
+    },
+    # per-user recipe match projection, kept current by ingredient events:
+    # user_id -> {'ingredients': frozenset of ingredient ids, 'matched': {recipe_id: count}}
+    'user_recipe_matches': {}
 }
 
+# ingredient_id -> (recipe_id, ...) and recipe_id -> ingredient count
+# the recipe catalogue doesn't change at runtime, so each lookup is cached
+_recipes_by_ingredient = {}
+_recipe_sizes = {}
+
+# writers serialize their read-copy-swap on this; readers never take it
+_write_lock = threading.Lock()
+
+def _recipes_using_ingredient(ingredient_id: str):
+    # inverted index lookup: which recipes use this ingredient
+    if ingredient_id not in _recipes_by_ingredient:
+        query = """
+            SELECT ui.r_id,
+                   (SELECT COUNT(*) FROM uses_ingredient t WHERE t.r_id = ui.r_id) AS total
+            FROM uses_ingredient ui
+            WHERE ui.i_id = %s;
+        """
+        rows = execute_query(query, (int(ingredient_id),), fetch_all=True)
+        for r in (rows or []):
+            _recipe_sizes[r['r_id']] = r['total']
+        _recipes_by_ingredient[ingredient_id] = tuple(r['r_id'] for r in (rows or []))
+    return _recipes_by_ingredient[ingredient_id]
+
+def _load_projection(user_id: str):
+    # first pantry event for this user in this process: seed from the database
+    query = "SELECT i_id FROM has_ingredient WHERE u_id = %s;"
+    rows = execute_query(query, (user_id,), fetch_all=True)
+    ingredient_ids = frozenset(str(r['i_id']) for r in (rows or []))
+    
+    matched = {}
+    for ingredient_id in ingredient_ids:
+        for recipe_id in _recipes_using_ingredient(ingredient_id):
+            matched[recipe_id] = matched.get(recipe_id, 0) + 1
+    return {'ingredients': ingredient_ids, 'matched': matched}
+
+def _bump_stat(name: str):
+    # replace the system stats dict rather than incrementing it in place
+    with _write_lock:
+        stats = _analytics_db['system_stats']
+        _analytics_db['system_stats'] = {**stats, name: stats[name] + 1}
+
 def get_analytics_db():
     # get in-memory analytics database (for session analytics)
     return _analytics_db
@@ -29,104 +85,147 @@ def setup_event_consumers():
     event_bus = get_event_bus()
     analytics_db = get_analytics_db()
     
-    def on_user_created(event_data):
-        user_id = event_data['data']['user_id']
-        username = event_data['data']['username']
+    def on_user_created(event):
+        user_id = event.user_id
+        username = event.username
         
         # track analytics
-        analytics_db['system_stats']['total_users_created'] += 1
+        _bump_stat('total_users_created')
         
         # log the event
-        print(f"EVENT: User '{username}' created (ID: {user_id[:8]}...)")
+        logger.debug("EVENT: User '%s' created (ID: %s...)", username, user_id[:8])
     
-    def on_user_profile_updated(event_data):
-        user_id = event_data['data']['user_id']
-        fields = event_data['data']['updated_fields']
+    def on_user_profile_updated(event):
+        user_id = event.user_id
+        fields = event.updated_fields
         
         # log the event
-        print(f"EVENT: User {user_id[:8]}... profile updated: {list(fields.keys())}")
+        logger.debug("EVENT: User %s... profile updated: %s", user_id[:8], list(fields.keys()))
     
-    def on_ingredient_added(event_data):
-        user_id = event_data['data']['user_id']
-        ingredient_name = event_data['data']['ingredient_name']
+    def on_ingredient_added(event):
+        user_id = event.user_id
+        ingredient_id = event.ingredient_id
+        ingredient_name = event.ingredient_name
+        
+        # database reads happen before taking the lock, so a cold user's seed
+        # doesn't hold up every other writer
+        seeded = None
+        if user_id not in analytics_db['user_recipe_matches']:
+            # seeded after the write, so this ingredient is already included
+            seeded = _load_projection(user_id)
+        recipe_ids = _recipes_using_ingredient(ingredient_id)
+        
+        # update the recipe match projection; re-adding an ingredient (amount or
+        # expiry change) doesn't change any match, so only new ones count
+        with _write_lock:
+            projections = analytics_db['user_recipe_matches']
+            projection = projections.get(user_id)
+            if projection is None:
+                projections[user_id] = seeded
+            elif ingredient_id not in projection['ingredients']:
+                # already seeded (possibly by a concurrent event), apply the delta
+                matched = dict(projection['matched'])
+                for recipe_id in recipe_ids:
+                    matched[recipe_id] = matched.get(recipe_id, 0) + 1
+                projections[user_id] = {
+                    'ingredients': projection['ingredients'] | {ingredient_id},
+                    'matched': matched
+                }
         
         # log the event
-        print(f"EVENT: Ingredient '{ingredient_name}' added to pantry")
+        logger.debug("EVENT: Ingredient '%s' added to pantry", ingredient_name)
     
-    def on_ingredient_removed(event_data):
-        user_id = event_data['data']['user_id']
-        ingredient_id = event_data['data']['ingredient_id']
+    def on_ingredient_removed(event):
+        user_id = event.user_id
+        ingredient_id = event.ingredient_id
+        
+        # update the recipe match projection (a cold user is seeded on next add);
+        # the recipe lookup may hit the database, so it happens before the lock
+        if user_id in analytics_db['user_recipe_matches']:
+            recipe_ids = _recipes_using_ingredient(ingredient_id)
+            with _write_lock:
+                projections = analytics_db['user_recipe_matches']
+                projection = projections[user_id]
+                if ingredient_id in projection['ingredients']:
+                    matched = dict(projection['matched'])
+                    for recipe_id in recipe_ids:
+                        count = matched.get(recipe_id, 0) - 1
+                        if count > 0:
+                            matched[recipe_id] = count
+                        else:
+                            matched.pop(recipe_id, None)
+                    projections[user_id] = {
+                        'ingredients': projection['ingredients'] - {ingredient_id},
+                        'matched': matched
+                    }
         
         # log the event
-        print(f"EVENT: Ingredient removed from pantry")
+        logger.debug("EVENT: Ingredient removed from pantry")
     
-    def on_recipe_favorited(event_data):
-        user_id = event_data['data']['user_id']
-        recipe_name = event_data['data']['recipe_name']
+    def on_recipe_favorited(event):
+        user_id = event.user_id
+        recipe_name = event.recipe_name
         
         # track analytics
-        analytics_db['system_stats']['total_favorites'] += 1
+        _bump_stat('total_favorites')
         
         # log the event
-        print(f"EVENT: Recipe '{recipe_name}' favorited")
+        logger.debug("EVENT: Recipe '%s' favorited", recipe_name)
     
-    def on_recipe_unfavorited(event_data):
-        user_id = event_data['data']['user_id']
-        recipe_id = event_data['data']['recipe_id']
+    def on_recipe_unfavorited(event):
+        user_id = event.user_id
+        recipe_id = event.recipe_id
         
         # log the event
-        print(f"EVENT: Recipe unfavorited")
+        logger.debug("EVENT: Recipe unfavorited")
     
-    def on_recipe_search_performed(event_data):
-        user_id = event_data['data']['user_id']
-        ingredients = event_data['data']['ingredients']
-        result_count = event_data['data']['result_count']
+    def on_recipe_search_performed(event):
+        user_id = event.user_id
+        ingredients = event.ingredients
+        result_count = event.result_count
         
         # track analytics in memory
-        if user_id not in analytics_db['user_analytics']:
+        with _write_lock:
+            analytics = analytics_db['user_analytics'].get(user_id)
+            # keeps only the last 10 searches, oldest dropped on append
+            recent_searches = deque(analytics['recent_searches'] if analytics else (), maxlen=10)
+            recent_searches.append({
+                'timestamp': event.timestamp,
+                'ingredients': ingredients,
+                'result_count': result_count
+            })
             analytics_db['user_analytics'][user_id] = {
-                'search_count': 0,
-                'recent_searches': []
+                'search_count': (analytics['search_count'] if analytics else 0) + 1,
+                'recent_searches': recent_searches
             }
         
-        analytics_db['user_analytics'][user_id]['search_count'] += 1
-        analytics_db['user_analytics'][user_id]['recent_searches'].append({
-            'timestamp': event_data['timestamp'],
-            'ingredients': ingredients,
-            'result_count': result_count
-        })
-        
-        # keep only last 10 searches
-        if len(analytics_db['user_analytics'][user_id]['recent_searches']) > 10:
-            analytics_db['user_analytics'][user_id]['recent_searches'].pop(0)
-        
         # track system-wide analytics
-        analytics_db['system_stats']['total_searches'] += 1
+        _bump_stat('total_searches')
         
         # log the event
-        print(f"📊 EVENT: Recipe search performed ({result_count} results)")
+        logger.debug("EVENT: Recipe search performed (%d results)", result_count)
     
-    def on_appliances_updated(event_data):
-        user_id = event_data['data']['user_id']
-        appliances = event_data['data']['appliances']
+    def on_appliances_updated(event):
+        user_id = event.user_id
+        appliances = event.appliances
         
         # log the event
-        print(f"📊 EVENT: User appliances updated ({len(appliances)} appliances)")
+        logger.debug("EVENT: User appliances updated (%d appliances)", len(appliances))
     
-    # subscribe to all events
-    event_bus.subscribe('USER_CREATED', on_user_created)
-    event_bus.subscribe('USER_PROFILE_UPDATED', on_user_profile_updated)
-    event_bus.subscribe('INGREDIENT_ADDED', on_ingredient_added)
-    event_bus.subscribe('INGREDIENT_REMOVED', on_ingredient_removed)
-    event_bus.subscribe('RECIPE_FAVORITED', on_recipe_favorited)
-    event_bus.subscribe('RECIPE_UNFAVORITED', on_recipe_unfavorited)
-    event_bus.subscribe('RECIPE_SEARCH_PERFORMED', on_recipe_search_performed)
-    event_bus.subscribe('USER_APPLIANCES_UPDATED', on_appliances_updated)
+    # subscribe to all events (consumers read fields straight off the event object)
+    # the pantry consumers query the database, so a failure there is contained
+    # instead of failing a command whose write has already been committed
+    event_bus.subscribe(EventType.USER_CREATED, on_user_created, typed=True)
+    event_bus.subscribe(EventType.USER_PROFILE_UPDATED, on_user_profile_updated, typed=True)
+    event_bus.subscribe(EventType.INGREDIENT_ADDED, on_ingredient_added, typed=True, safe=True)
+    event_bus.subscribe(EventType.INGREDIENT_REMOVED, on_ingredient_removed, typed=True, safe=True)
+    event_bus.subscribe(EventType.RECIPE_FAVORITED, on_recipe_favorited, typed=True)
+    event_bus.subscribe(EventType.RECIPE_UNFAVORITED, on_recipe_unfavorited, typed=True)
+    event_bus.subscribe(EventType.RECIPE_SEARCH_PERFORMED, on_recipe_search_performed, typed=True)
+    event_bus.subscribe(EventType.USER_APPLIANCES_UPDATED, on_appliances_updated, typed=True)
     
-    print(" Event Consumers Initialized (PostgreSQL Mode)")
-    print("   - Events logged for audit trail")
-    print("   - Analytics tracked in-memory")
-    print("   - Data persisted in PostgreSQL")
+    logger.info("Event consumers initialized (PostgreSQL mode): events logged for audit trail, "
+                "analytics tracked in-memory, data persisted in PostgreSQL")
 
 def get_system_analytics():
     # get system-wide analytics
@@ -134,7 +233,34 @@ def get_system_analytics():
 
 def get_user_analytics(user_id: str):
     # get analytics for specific user
-    return _analytics_db['user_analytics'].get(user_id, {
-        'search_count': 0,
-        'recent_searches': []
-    })
\ No newline at end of file
+    analytics = _analytics_db['user_analytics'].get(user_id)
+    if analytics is None:
+        return {'search_count': 0, 'recent_searches': []}
+    
+    # recent_searches is a deque internally; hand out a JSON-friendly list
+    return {
+        'search_count': analytics['search_count'],
+        'recent_searches': list(analytics['recent_searches'])
+    }
+
+def get_user_recipe_matches(user_id: str, top_n: int = 10):
+    # top recipes by match percentage from the event-maintained projection
+    # returns None when this process hasn't seen any pantry events for the user
+    projection = _analytics_db['user_recipe_matches'].get(user_id)
+    if projection is None:
+        return None
+    
+    top = heapq.nlargest(
+        top_n,
+        projection['matched'].items(),
+        key=lambda item: item[1] / _recipe_sizes[item[0]]
+    )
+    return [
+        {
+            'id': recipe_id,
+            'match_percentage': round(count / _recipe_sizes[recipe_id] * 100, 1),
+            'matched_count': count,
+            'total_count': _recipe_sizes[recipe_id]
+        }
+        for recipe_id, count in top
+    ]
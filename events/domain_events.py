@@ -1,17 +1,37 @@
 # Domain Events for SmartFridge
 # events are published to the event bus
+# each event is a frozen, slotted dataclass: no per-instance __dict__ and no
+# nested payload dict unless a subscriber asks for one via to_dict()
 
-from datetime import datetime
-from typing import List, Dict, Any
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from typing import ClassVar, List, Dict, Any, Optional
+import time
 
+from events.event_types import EventType
+
+_EPOCH = datetime(1970, 1, 1)
+
+@dataclass(frozen=True, slots=True)
 class DomainEvent:
     # base class for all domain events
-    def __init__(self, event_type: str, data: Dict[str, Any]):
-        self.event_type = event_type
-        self.data = data
-        self.timestamp = datetime.utcnow().isoformat()
-    
+    event_type: ClassVar[EventType] = EventType.DOMAIN_EVENT
+
+    # raw clock read only; ISO formatting happens when someone asks for it
+    _ts_ns: int = field(default_factory=time.time_ns, init=False, repr=False, compare=False)
+
+    @property
+    def timestamp(self) -> str:
+        # UTC ISO-8601 string, same format as datetime.utcnow().isoformat()
+        return (_EPOCH + timedelta(microseconds=self._ts_ns // 1000)).isoformat()
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        # event payload as a plain dict (every field except the timestamp)
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+
     def to_dict(self):
+        # legacy dict shape for subscribers that don't take the event object
         return {
             'event_type': self.event_type,
             'data': self.data,
@@ -20,79 +40,71 @@ class DomainEvent:
 
 # USER EVENTS
 
+@dataclass(frozen=True, slots=True)
 class UserCreatedEvent(DomainEvent):
     # Published when a new user registers
-    def __init__(self, user_id: str, username: str, dietary_restrictions: List[str]):
-        super().__init__('USER_CREATED', {
-            'user_id': user_id,
-            'username': username,
-            'dietary_restrictions': dietary_restrictions
-        })
+    event_type: ClassVar[EventType] = EventType.USER_CREATED
+    user_id: str
+    username: str
+    dietary_restrictions: List[str]
 
+@dataclass(frozen=True, slots=True)
 class UserProfileUpdatedEvent(DomainEvent):
     # Published when user profile is updated
-    def __init__(self, user_id: str, updated_fields: Dict[str, Any]):
-        super().__init__('USER_PROFILE_UPDATED', {
-            'user_id': user_id,
-            'updated_fields': updated_fields
-        })
+    event_type: ClassVar[EventType] = EventType.USER_PROFILE_UPDATED
+    user_id: str
+    updated_fields: Dict[str, Any]
 
 # INGREDIENT EVENTS
 
+@dataclass(frozen=True, slots=True)
 class IngredientAddedEvent(DomainEvent):
     # published when user adds ingredient to pantry
-    def __init__(self, user_id: str, ingredient_id: str, ingredient_name: str, amount: float, exp_date: str = None):
-        super().__init__('INGREDIENT_ADDED', {
-            'user_id': user_id,
-            'ingredient_id': ingredient_id,
-            'ingredient_name': ingredient_name,
-            'amount': amount,
-            'exp_date': exp_date
-        })
+    event_type: ClassVar[EventType] = EventType.INGREDIENT_ADDED
+    user_id: str
+    ingredient_id: str
+    ingredient_name: str
+    amount: float
+    exp_date: Optional[str] = None
 
+@dataclass(frozen=True, slots=True)
 class IngredientRemovedEvent(DomainEvent):
     # published when user removes ingredient from pantry
-    def __init__(self, user_id: str, ingredient_id: str):
-        super().__init__('INGREDIENT_REMOVED', {
-            'user_id': user_id,
-            'ingredient_id': ingredient_id
-        })
+    event_type: ClassVar[EventType] = EventType.INGREDIENT_REMOVED
+    user_id: str
+    ingredient_id: str
 
 # RECIPE EVENTS
 
+@dataclass(frozen=True, slots=True)
 class RecipeSearchPerformedEvent(DomainEvent):
     # published when user searches for recipes
-    def __init__(self, user_id: str, ingredients: List[str], filters: Dict[str, Any], result_count: int):
-        super().__init__('RECIPE_SEARCH_PERFORMED', {
-            'user_id': user_id,
-            'ingredients': ingredients,
-            'filters': filters,
-            'result_count': result_count
-        })
+    event_type: ClassVar[EventType] = EventType.RECIPE_SEARCH_PERFORMED
+    user_id: str
+    ingredients: List[str]
+    filters: Dict[str, Any]
+    result_count: int
 
+@dataclass(frozen=True, slots=True)
 class RecipeFavoritedEvent(DomainEvent):
     # published when user favorites a recipe
-    def __init__(self, user_id: str, recipe_id: str, recipe_name: str):
-        super().__init__('RECIPE_FAVORITED', {
-            'user_id': user_id,
-            'recipe_id': recipe_id,
-            'recipe_name': recipe_name
-        })
+    event_type: ClassVar[EventType] = EventType.RECIPE_FAVORITED
+    user_id: str
+    recipe_id: str
+    recipe_name: str
 
+@dataclass(frozen=True, slots=True)
 class RecipeUnfavoritedEvent(DomainEvent):
     # published when user removes recipe from favorites
-    def __init__(self, user_id: str, recipe_id: str):
-        super().__init__('RECIPE_UNFAVORITED', {
-            'user_id': user_id,
-            'recipe_id': recipe_id
-        })
+    event_type: ClassVar[EventType] = EventType.RECIPE_UNFAVORITED
+    user_id: str
+    recipe_id: str
 
 # APPLIANCE EVENTS
 
+@dataclass(frozen=True, slots=True)
 class UserAppliancesUpdatedEvent(DomainEvent):
     # published when user updates their available appliances
-    def __init__(self, user_id: str, appliances: List[str]):
-        super().__init__('USER_APPLIANCES_UPDATED', {
-            'user_id': user_id,
-            'appliances': appliances
-        })
\ No newline at end of file
+    event_type: ClassVar[EventType] = EventType.USER_APPLIANCES_UPDATED
+    user_id: str
+    appliances: List[str]
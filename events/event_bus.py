@@ -1,44 +1,202 @@
 # Event Bus implementation
 
-from typing import Callable, List, Dict
-from collections import defaultdict
+from typing import Callable, List, Dict, Tuple
+from collections import deque
+import atexit
+import os
+import queue
+import threading
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class EventBus:
     # pub/sub event bus for CQRS+EDA
     
-    def __init__(self):
-        # dictionary mapping event types to list of subscriber callbacks
-        self._subscribers: Dict[str, List[Callable]] = defaultdict(list)
-        # store event history for debugging
-        self._event_log: List[Dict] = []
+    def __init__(self, async_mode: bool = False, batch_size: int = 64):
+        # dictionary mapping event types to subscriber callbacks
+        # values are tuples replaced on subscribe (copy-on-write), so dispatch
+        # iterates a stable snapshot even if a callback subscribes mid-publish
+        self._subscribers: Dict[str, Tuple[Callable, ...]] = {}
+        # subscribers that take the event object instead of a dict
+        self._typed_subscribers: Dict[str, Tuple[Callable, ...]] = {}
+        # subscribers that take a list of events at once
+        self._batch_subscribers: Dict[str, Tuple[Callable, ...]] = {}
+        # store recent event history for debugging (oldest entries drop off)
+        self._event_log = deque(maxlen=int(os.environ.get('EVENT_LOG_SIZE', 10000)))
+        
+        # in async mode publish only enqueues; a daemon thread delivers in batches
+        self._async_mode = async_mode
+        self._batch_size = batch_size
+        # guards the switch out of async mode against concurrent enqueues
+        self._state_lock = threading.Lock()
+        self._dispatcher = None
+        if async_mode:
+            self._queue = queue.SimpleQueue()
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+            self._dispatcher.start()
+            # deliver whatever is still queued when the interpreter exits
+            atexit.register(self.close)
     
     def publish(self, event) -> None:
         # publish an event to all subscribers
 
-        event_dict = event.to_dict()
+        # log the event object itself; dicts are only built for subscribers that need them
+        self._event_log.append(event)
+        logger.debug("EVENT PUBLISHED: %s", event.event_type)
         
-        # log the event
-        self._event_log.append(event_dict)
-        print(f"EVENT PUBLISHED: {event.event_type}")
+        if self._async_mode:
+            with self._state_lock:
+                # re-checked under the lock so nothing is queued behind close()
+                if self._async_mode:
+                    self._queue.put(event)
+                    return
         
-        # notify all subscribers
-        if event.event_type in self._subscribers:
-            for callback in self._subscribers[event.event_type]:
-                try:
-                    callback(event_dict)
-                except Exception as e:
-                    print(f"Error in subscriber for {event.event_type}: {e}")
+        # after close, earlier events still queued go out first
+        self._wait_for_dispatcher()
+        self._deliver(event.event_type, (event,))
     
-    def subscribe(self, event_type: str, callback: Callable) -> None:
+    def subscribe(self, event_type: str, callback: Callable, typed: bool = False, safe: bool = False) -> None:
         # subscribe to a specific event type
+        # typed subscribers receive the event object itself, others get event.to_dict()
+        # exceptions propagate to the publisher unless the subscriber opts into safe=True
+        # (in async mode there is no publisher to propagate to, so every
+        # subscriber is contained and one failure can't cost the rest of a batch)
+
+        if safe or self._async_mode:
+            callback = self._contain_errors(event_type, callback)
+        subscribers = self._typed_subscribers if typed else self._subscribers
+        subscribers[event_type] = subscribers.get(event_type, ()) + (callback,)
+        logger.debug("Subscribed to: %s", event_type)
+    
+    def subscribe_batch(self, event_type: str, callback: Callable, safe: bool = False) -> None:
+        # subscribe with a callback that receives a list of events of this type
 
-        self._subscribers[event_type].append(callback)
-        print(f"Subscribed to: {event_type}")
+        if safe or self._async_mode:
+            callback = self._contain_errors(event_type, callback)
+        self._batch_subscribers[event_type] = self._batch_subscribers.get(event_type, ()) + (callback,)
+        logger.debug("Subscribed (batch) to: %s", event_type)
+    
+    @staticmethod
+    def _contain_errors(event_type: str, callback: Callable) -> Callable:
+        # wrap once at subscribe time so only opted-in subscribers pay for the handler
+        def safe_callback(payload):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error("Error in subscriber for %s: %s", event_type, e)
+        return safe_callback
+    
+    def flush(self, timeout: float = None) -> bool:
+        # block until every event published so far has been delivered
+        # returns False if the timeout ran out first
+        with self._state_lock:
+            if not self._async_mode:
+                return self._wait_for_dispatcher(timeout)
+            delivered = threading.Event()
+            self._queue.put(delivered)
+        return delivered.wait(timeout)
+    
+    def close(self, timeout: float = None) -> None:
+        # deliver the queued events and stop the dispatcher thread
+        # publishes after this are delivered synchronously, once the
+        # dispatcher has finished (so only one thread ever delivers)
+        with self._state_lock:
+            if not self._async_mode:
+                return
+            self._async_mode = False
+            self._queue.put(None)
+        
+        if self._wait_for_dispatcher(timeout):
+            self._drain()
+    
+    def _wait_for_dispatcher(self, timeout: float = None) -> bool:
+        # block until a closed bus's dispatcher thread has exited
+        # returns False if the timeout ran out first
+        # (a subscriber publishing from the dispatcher itself can't wait on it)
+        if self._dispatcher is None or self._dispatcher is threading.current_thread():
+            return True
+        self._dispatcher.join(timeout)
+        return not self._dispatcher.is_alive()
+    
+    def _drain(self) -> None:
+        # deliver anything left in the queue after the dispatcher stopped
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._dispatch_safely([item for item in items if item is not None and not isinstance(item, threading.Event)])
+        for item in items:
+            if isinstance(item, threading.Event):
+                item.set()
+    
+    def _dispatch_loop(self) -> None:
+        # background worker: block for one event, then drain up to batch_size
+        # a threading.Event in the queue is a flush marker, None means close
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            events = []
+            for item in batch:
+                if item is None or isinstance(item, threading.Event):
+                    # everything queued before the marker goes out first
+                    self._dispatch_safely(events)
+                    events = []
+                    if item is None:
+                        return
+                    item.set()
+                else:
+                    events.append(item)
+            self._dispatch_safely(events)
+    
+    def _dispatch_safely(self, events: List) -> None:
+        # subscribers are contained already; this guards the thread against
+        # anything else (e.g. a failing to_dict)
+        try:
+            self._dispatch_batch(events)
+        except Exception as e:
+            logger.error("Error dispatching event batch: %s", e)
+    
+    def _dispatch_batch(self, batch: List) -> None:
+        # group a batch by type so each batch subscriber is called once per type
+        by_type: Dict[str, List] = {}
+        for event in batch:
+            by_type.setdefault(event.event_type, []).append(event)
+        
+        for event_type, events in by_type.items():
+            self._deliver(event_type, events)
+    
+    def _deliver(self, event_type: str, events) -> None:
+        # per-event subscribers get the events one at a time, in order
+        for callback in self._typed_subscribers.get(event_type, ()):
+            for event in events:
+                callback(event)
+        
+        callbacks = self._subscribers.get(event_type, ())
+        batch_callbacks = self._batch_subscribers.get(event_type, ())
+        if not callbacks and not batch_callbacks:
+            return
+        
+        # dict subscribers share one materialized dict per event
+        event_dicts = [event.to_dict() for event in events]
+        for callback in callbacks:
+            for event_dict in event_dicts:
+                callback(event_dict)
+        
+        for callback in batch_callbacks:
+            callback(event_dicts)
     
     def get_event_log(self) -> List[Dict]:
-        # return all published events (for debugging)
-        return self._event_log
+        # return recently published events (for debugging)
+        return [event.to_dict() for event in self._event_log]
     
     def clear_log(self) -> None:
         # clear event log
@@ -50,4 +208,4 @@ _event_bus = EventBus()
 
 def get_event_bus() -> EventBus:
     # get the global event bus instance
-    return _event_bus
\ No newline at end of file
+    return _event_bus
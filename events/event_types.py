@@ -0,0 +1,29 @@
+# Event type names for SmartFridge
+# one shared set of constants for publishers and subscribers, so a typo is an
+# AttributeError at import instead of a subscription that never fires
+
+from enum import Enum
+
+class EventType(str, Enum):
+    # str subclass: members are valid dict keys and JSON strings as-is
+    DOMAIN_EVENT = 'DOMAIN_EVENT'
+
+    # user events
+    USER_CREATED = 'USER_CREATED'
+    USER_PROFILE_UPDATED = 'USER_PROFILE_UPDATED'
+
+    # ingredient events
+    INGREDIENT_ADDED = 'INGREDIENT_ADDED'
+    INGREDIENT_REMOVED = 'INGREDIENT_REMOVED'
+
+    # recipe events
+    RECIPE_SEARCH_PERFORMED = 'RECIPE_SEARCH_PERFORMED'
+    RECIPE_FAVORITED = 'RECIPE_FAVORITED'
+    RECIPE_UNFAVORITED = 'RECIPE_UNFAVORITED'
+
+    # appliance events
+    USER_APPLIANCES_UPDATED = 'USER_APPLIANCES_UPDATED'
+
+    def __str__(self) -> str:
+        # log and format as the bare name, same as the old string constants
+        return self.value
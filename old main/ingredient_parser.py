@@ -1,4 +1,21 @@
-from fuzzywuzzy import fuzz, process
+import math
+import re
+from bisect import bisect_left, bisect_right
+from rapidfuzz import process, utils
+from rapidfuzz.distance import JaroWinkler
+
+# (master list, its ingredients, the same ingredients run through default_process,
+#  their processed lengths), all sorted by processed length
+_prepared_master = (None, (), (), ())
+
+# separators between ingredients in user input; runs of them count as one
+_SEP_RE = re.compile(r'[,\n]+')
+
+# fuzzy results for the prepared master, keyed on (lowercased input, threshold)
+# emptied whenever a different master list is prepared; the oldest entry is
+# dropped once it holds MATCH_CACHE_SIZE results
+MATCH_CACHE_SIZE = 4096
+_match_cache = {}
 
 def build_master_ingredient_list(recipes):
     # extracts all unique ingredients from the recipe database.
@@ -11,11 +28,60 @@ def build_master_ingredient_list(recipes):
             # normalize to lowercase
             master_ingredients.add(ingredient.lower().strip())
     
-    return master_ingredients
+    # frozen so the preprocessed copy used for fuzzy matching can't go stale
+    return frozenset(master_ingredients)
 
-def fuzzy_match_ingredient(user_input, master_ingredients, threshold=80):
+def _prepare_choices(master_ingredients):
+    # normalizes the master list once per list instead of on every lookup
+    # sorted by length so a query can slice out the lengths that could match
+    global _prepared_master
+    
+    if _prepared_master[0] is not master_ingredients:
+        # results against the old list no longer apply
+        _match_cache.clear()
+        pairs = sorted(
+            ((utils.default_process(ing), ing) for ing in master_ingredients),
+            key=lambda pair: len(pair[0])
+        )
+        _prepared_master = (
+            master_ingredients,
+            tuple(ing for _, ing in pairs),
+            tuple(processed for processed, _ in pairs),
+            tuple(len(processed) for processed, _ in pairs)
+        )
+    
+    return _prepared_master[1:]
+
+def _length_window(query_length, threshold):
+    # candidate lengths that could reach threshold (0-100) against the query.
+    # Jaro is at most (2 + short/long) / 3 and the Winkler prefix bonus at most
+    # closes 40% of the gap, so a score of s needs short/long >= (s - 0.8) / 0.2
+    min_ratio = (threshold / 100 - 0.8) / 0.2
+    if min_ratio <= 0:
+        return 0, math.inf
+    return math.ceil(query_length * min_ratio), math.floor(query_length / min_ratio)
+
+def fuzzy_match_ingredient(user_input, master_ingredients, threshold=88):
     # attempts to match a user's ingredient input to known ingredients using fuzzy matching.
     # handles typos, variations, and close matches.
+    # results are memoized per master list, so repeat queries in a run are free
+
+    originals, processed, lengths = _prepare_choices(master_ingredients)
+    # matching is case-insensitive, so case variants share one entry
+    key = (user_input.lower(), threshold)
+    result = _match_cache.get(key)
+    if result is None:
+        while len(_match_cache) >= MATCH_CACHE_SIZE:
+            del _match_cache[next(iter(_match_cache))]
+        result = _match_cache[key] = _fuzzy_match(user_input, master_ingredients, threshold,
+                                                  originals, processed, lengths)
+    
+    # hand out a copy so callers can't edit the cached result, reporting
+    # this call's own spelling as the original
+    return {**result, 'original': user_input}
+
+def _fuzzy_match(user_input, master_ingredients, threshold, originals, processed, lengths):
+    # uncached lookup behind fuzzy_match_ingredient
 
     # if it's an exact match, we're golden!
     if user_input.lower() in master_ingredients:
@@ -27,38 +93,62 @@ def fuzzy_match_ingredient(user_input, master_ingredients, threshold=80):
         }
     
     # try to find close matches using fuzzy matching
-    # process.extractOne returns (best_match, score)
+    # both sides are already normalized, so no processor runs per comparison
+    query = utils.default_process(user_input)
+    
+    # only score candidates whose length leaves them able to reach the threshold
+    min_length, max_length = _length_window(len(query), threshold)
+    start = bisect_left(lengths, min_length)
+    end = bisect_right(lengths, max_length)
+    
+    # process.extractOne returns (best_match, score, index), or None when nothing
+    # reaches score_cutoff (candidates below it are dropped inside rapidfuzz)
     best_match = process.extractOne(
-        user_input.lower(),
-        master_ingredients,
-        scorer=fuzz.ratio  # using basic Levenshtein distance
+        query,
+        processed[start:end],
+        # Jaro-Winkler suits short names: it weights the shared prefix and
+        # skips Levenshtein's full DP table (scores are 0-1, reported as 0-100)
+        scorer=JaroWinkler.normalized_similarity,
+        processor=None,
+        score_cutoff=threshold / 100
     )
     
-    if best_match and best_match[1] >= threshold:
-        # found a good match
-        confidence = best_match[1]
+    if best_match:
+        # found a good match (rounded to whole percent)
+        confidence = round(best_match[1] * 100)
         
         return {
-            'match': best_match[0],
+            'match': originals[start + best_match[2]],
             'score': confidence,
             'original': user_input,
-            'needs_confirmation': confidence < 95  # ask user if not super confident
+            'needs_confirmation': confidence < 98  # ask user if not super confident
         }
     
     # no good match found
     return {
         'match': None,
-        'score': best_match[1] if best_match else 0,
+        'score': 0,
         'original': user_input,
         'needs_confirmation': False
     }
 
+def match_ingredients(raw_ingredients, master_ingredients, threshold=88):
+    # scores every user ingredient up front, before any prompting
+    # repeated inputs are only matched once
+
+    results = {}
+    for raw_ing in raw_ingredients:
+        if raw_ing not in results:
+            results[raw_ing] = fuzzy_match_ingredient(raw_ing, master_ingredients, threshold=threshold)
+    
+    return [results[raw_ing] for raw_ing in raw_ingredients]
+
 def parse_ingredients(raw_input, master_ingredients=None, interactive=True):
     # accepts comma-separated or newline-separated ingredients
     # returns a clean list of ingredients
 
     # split on commas or newlines
-    ingredients = raw_input.replace('\n', ',').split(',')
+    ingredients = _SEP_RE.split(raw_input)
     
     # normalize: lowercase and strip whitespace
     raw_ingredients = [ing.strip().lower() for ing in ingredients if ing.strip()]
@@ -67,74 +157,131 @@ def parse_ingredients(raw_input, master_ingredients=None, interactive=True):
     if master_ingredients is None:
         return raw_ingredients, {}
     
-    # fuzzy matching process
-    cleaned = []
+    # fuzzy matching process (no I/O until everything is decided)
+    match_results = match_ingredients(raw_ingredients, master_ingredients, threshold=88)
+    
+    # one slot per input ingredient; questions fill theirs in after answering,
+    # so the cleaned list keeps the order the user typed
+    slots = []
     fuzzy_report = {
         'exact_matches': [],
         'fuzzy_matches': [],
         'unmatched': [],
         'user_confirmations': []
     }
+    questions = []
     
-    print("\n" + "-" * 70)
-    print("Validating ingredients...")
-    print("-" * 70)
+    # output is collected here and printed in one write
+    lines = ["\n" + "-" * 70, "Validating ingredients...", "-" * 70]
     
-    for raw_ing in raw_ingredients:
-        match_result = fuzzy_match_ingredient(raw_ing, master_ingredients, threshold=80)
-        
+    for raw_ing, match_result in zip(raw_ingredients, match_results):
         if match_result['match']:
             if match_result['score'] == 100:
                 # exact match, no questions asked
-                cleaned.append(match_result['match'])
+                slots.append(match_result['match'])
                 fuzzy_report['exact_matches'].append(raw_ing)
-                print(f"{raw_ing}")
+                lines.append(f"{raw_ing}")
             
             elif match_result['needs_confirmation'] and interactive:
-                # fuzzy match, ask for confirmation
-                print(f"'{raw_ing}' → Did you mean '{match_result['match']}'? (y/n)")
-                confirmation = input("   > ").strip().lower()
-                
-                if confirmation == 'y' or confirmation == 'yes':
-                    cleaned.append(match_result['match'])
-                    fuzzy_report['fuzzy_matches'].append({
-                        'original': raw_ing,
-                        'matched': match_result['match'],
-                        'score': match_result['score']
-                    })
-                    fuzzy_report['user_confirmations'].append(raw_ing)
-                    print(f"Using '{match_result['match']}'")
-                else:
-                    # user rejected the suggestion
-                    print(f"Skipping '{raw_ing}'")
-                    fuzzy_report['unmatched'].append(raw_ing)
+                # fuzzy match, ask for confirmation with the other questions
+                questions.append((len(slots), raw_ing, match_result))
+                slots.append(None)
+                lines.append(f"'{raw_ing}' → '{match_result['match']}'? (needs confirmation)")
             
             else:
-                # high confidence match (95+), use without asking
-                cleaned.append(match_result['match'])
+                # high confidence match (98+), use without asking
+                slots.append(match_result['match'])
                 fuzzy_report['fuzzy_matches'].append({
                     'original': raw_ing,
                     'matched': match_result['match'],
                     'score': match_result['score']
                 })
-                print(f"{raw_ing} → {match_result['match']} ({match_result['score']}% match)")
+                lines.append(f"{raw_ing} → {match_result['match']} ({match_result['score']}% match)")
         
         else:
             # no match found
-            print(f"'{raw_ing}' - not recognized (no close matches found)")
+            lines.append(f"'{raw_ing}' - not recognized (no close matches found)")
             fuzzy_report['unmatched'].append(raw_ing)
             
             if interactive:
-                print(f"Keep it anyway? (y/n)")
-                keep = input("   > ").strip().lower()
-                if keep == 'y' or keep == 'yes':
-                    cleaned.append(raw_ing)
-                    print(f"Added '{raw_ing}' as-is")
+                questions.append((len(slots), raw_ing, None))
+                slots.append(None)
+    
+    lines.append("-" * 70)
+    print("\n".join(lines))
     
-    print("-" * 70)
+    if questions:
+        accepted = _ask_confirmations(questions)
+        
+        for number, (slot, raw_ing, match_result) in enumerate(questions, 1):
+            if match_result is None:
+                # keep an unrecognized ingredient as typed
+                if number in accepted:
+                    slots[slot] = raw_ing
+            elif number in accepted:
+                slots[slot] = match_result['match']
+                fuzzy_report['fuzzy_matches'].append({
+                    'original': raw_ing,
+                    'matched': match_result['match'],
+                    'score': match_result['score']
+                })
+                fuzzy_report['user_confirmations'].append(raw_ing)
+            else:
+                # user rejected the suggestion
+                fuzzy_report['unmatched'].append(raw_ing)
     
+    cleaned = [ing for ing in slots if ing is not None]
     return cleaned, fuzzy_report
 
+def _ask_confirmations(questions):
+    # asks every pending yes/no question in one prompt
+    # returns the set of question numbers the user accepted
+    lines = ["\nPlease confirm:"]
+    for number, (_, raw_ing, match_result) in enumerate(questions, 1):
+        if match_result is None:
+            lines.append(f"  {number}. Keep '{raw_ing}' anyway?")
+        else:
+            lines.append(f"  {number}. '{raw_ing}' → Did you mean '{match_result['match']}'?")
+    lines.append("Enter the numbers to accept (e.g. 1,3), 'all', or 'none' (or press Enter)")
+    print("\n".join(lines))
+    
+    # ask again until every part of the answer is a listed number
+    while True:
+        accepted, invalid = _parse_confirmations(input("   > "), len(questions))
+        if not invalid:
+            break
+        print(f"   Not a number from 1 to {len(questions)}: {', '.join(invalid)} - please try again")
+    
+    # echo the decisions so the user can see what was understood
+    lines = []
+    for number, (_, raw_ing, match_result) in enumerate(questions, 1):
+        if number not in accepted:
+            lines.append(f"   Skipping '{raw_ing}'")
+        elif match_result is None:
+            lines.append(f"   Keeping '{raw_ing}'")
+        else:
+            lines.append(f"   Using '{match_result['match']}' for '{raw_ing}'")
+    print("\n".join(lines))
+    
+    return accepted
+
+def _parse_confirmations(answer, count):
+    # splits an answer into (accepted question numbers, parts that aren't 1..count)
+    answer = answer.strip().lower()
+    if answer in ('all', 'y', 'yes'):
+        return set(range(1, count + 1)), []
+    if answer in ('n', 'no', 'none'):
+        return set(), []
+    
+    accepted = set()
+    invalid = []
+    for part in answer.replace(',', ' ').split():
+        if part.isdigit() and 1 <= int(part) <= count:
+            accepted.add(int(part))
+        else:
+            invalid.append(part)
+    return accepted, invalid
+
 def display_fuzzy_summary(fuzzy_report, final_ingredients):
     # show fuzzy match summary if any corrections were made
     if fuzzy_report['fuzzy_matches'] or fuzzy_report['unmatched']:
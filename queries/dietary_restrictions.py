@@ -2,6 +2,8 @@
 Dietary Restriction Filtering System
 Maps dietary restrictions to ingredient exclusions
 """
+import re
+from functools import lru_cache
 
 # comprehensive mapping of dietary restrictions to forbidden ingredients
 DIETARY_RESTRICTIONS = {
@@ -55,6 +57,19 @@ DIETARY_RESTRICTIONS = {
 }
 
 
+# per restriction: one regex matching any forbidden ingredient inside a recipe
+# ingredient, plus the forbidden list joined into one string for the reverse
+# check (recipe ingredient inside a forbidden one). both scans run in C and
+# only hits fall through to the ordered loop that picks the reported term
+_FORBIDDEN_SCANS = {
+    name: (
+        re.compile('|'.join(re.escape(ing) for ing in data['forbidden_ingredients'])),
+        '\x00'.join(data['forbidden_ingredients'])
+    )
+    for name, data in DIETARY_RESTRICTIONS.items()
+}
+
+
 def check_recipe_compatibility(recipe_ingredients, user_dietary_restrictions):
     """
     Check if a recipe is compatible with user's dietary restrictions
@@ -77,35 +92,55 @@ def check_recipe_compatibility(recipe_ingredients, user_dietary_restrictions):
         if restriction_lower not in DIETARY_RESTRICTIONS:
             continue
         
-        forbidden = DIETARY_RESTRICTIONS[restriction_lower]['forbidden_ingredients']
-        
         # check if any recipe ingredient is forbidden
         for recipe_ing in recipe_ingredients_lower:
-            for forbidden_ing in forbidden:
-                # check for exact match or if forbidden ingredient is part of recipe ingredient; e.g., "cheese" matches "cheddar cheese"
-                if forbidden_ing in recipe_ing or recipe_ing in forbidden_ing:
-                    violations.append({
-                        'restriction': restriction,
-                        'ingredient': recipe_ing,
-                        'reason': f"Contains {forbidden_ing}"
-                    })
-                    break
+            forbidden_ing = _forbidden_match(restriction_lower, recipe_ing)
+            if forbidden_ing is not None:
+                violations.append({
+                    'restriction': restriction,
+                    'ingredient': recipe_ing,
+                    'reason': f"Contains {forbidden_ing}"
+                })
     
     is_compatible = len(violations) == 0
     return is_compatible, violations
 
 
+@lru_cache(maxsize=8192)
+def _forbidden_match(restriction_lower, recipe_ing):
+    # first forbidden ingredient of a restriction matching a recipe ingredient, or None
+    # the catalogue reuses the same ingredient names across recipes, so each
+    # (restriction, ingredient) pair is only scanned once
+    pattern, joined = _FORBIDDEN_SCANS[restriction_lower]
+    if not pattern.search(recipe_ing) and recipe_ing not in joined:
+        # most ingredients break no restriction; reject those without a Python loop
+        return None
+    
+    for forbidden_ing in DIETARY_RESTRICTIONS[restriction_lower]['forbidden_ingredients']:
+        # check for exact match or if forbidden ingredient is part of recipe ingredient; e.g., "cheese" matches "cheddar cheese"
+        if forbidden_ing in recipe_ing or recipe_ing in forbidden_ing:
+            return forbidden_ing
+    return None
+
+
+@lru_cache(maxsize=64)
 def get_restriction_info(restriction_name):
     # get information about a dietary restriction
+    # a handful of names (in any casing) are looked up repeatedly, so answers are cached
     restriction_lower = restriction_name.lower().strip()
     if restriction_lower in DIETARY_RESTRICTIONS:
         return DIETARY_RESTRICTIONS[restriction_lower]
     return None
 
 
+# restriction names, collected once at import
+_ALL_RESTRICTIONS = tuple(DIETARY_RESTRICTIONS)
+
+
 def get_all_restrictions():
     # get list of all supported dietary restrictions
-    return list(DIETARY_RESTRICTIONS.keys())
+    # a fresh list each call so callers can't change the shared names
+    return list(_ALL_RESTRICTIONS)
 
 
 def format_violation_message(violations):
@@ -1,19 +1,39 @@
 # Query Handlers - Read Side of CQRS with PostgreSQL
 from typing import Dict, Any, List, Optional
+import heapq
 from database.db_connection import execute_query
+from consumers.event_consumers import get_user_recipe_matches
+import logging
 import sys
 import os
 
+logger = logging.getLogger(__name__)
+
 try:
     from queries.dietary_restrictions import check_recipe_compatibility
     DIETARY_FILTERING_AVAILABLE = True
-    print(" Dietary restrictions module loaded successfully")
+    logger.info("Dietary restrictions module loaded successfully")
 except ImportError as e:
-    print(f"  Warning: Dietary restrictions module not available: {e}")
+    logger.warning("Dietary restrictions module not available: %s", e)
     DIETARY_FILTERING_AVAILABLE = False
     def check_recipe_compatibility(ingredients, restrictions):
         return True, []  # No filtering if module unavailable
 
+def _calculate_match(recipe_ingredients: List[str], user_set: frozenset) -> Dict[str, Any]:
+    # score one recipe against the user's ingredients
+    # user_set is built once per query so each membership test is a hash lookup
+    matched = [ing for ing in recipe_ingredients if ing in user_set]
+    missing = [ing for ing in recipe_ingredients if ing not in user_set]
+    
+    total = len(recipe_ingredients)
+    percentage = round(len(matched) / total * 100, 1) if total > 0 else 0
+    
+    return {
+        'percentage': percentage,
+        'matched': matched,
+        'missing': missing
+    }
+
 def query_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
     # QUERY: get user profile from PostgreSQL
     query = """
@@ -54,6 +74,19 @@ def query_user_pantry(user_id: str) -> List[Dict[str, Any]]:
         for r in (results or [])
     ]
 
+def query_user_pantry_names(user_id: str) -> frozenset:
+    # QUERY: just the (lowercased) ingredient names in a user's pantry
+    # cheaper than query_user_pantry when only matching against recipes
+    query = """
+        SELECT i.name
+        FROM has_ingredient hi
+        JOIN ingredients i ON hi.i_id = i.i_id
+        WHERE hi.u_id = %s;
+    """
+    results = execute_query(query, (user_id,), fetch_all=True)
+    
+    return frozenset(r['name'].lower() for r in (results or []))
+
 def query_recipe_by_id(recipe_id: str) -> Optional[Dict[str, Any]]:
     # QUERY: get single recipe by ID with full details from PostgreSQL
     # get recipe basic info
@@ -153,10 +186,10 @@ def query_recipes_by_ingredients(ingredient_names: List[str], filters: Dict[str,
         if user_result and user_result.get('diet'):
             # diet is stored as comma-separated string
             user_dietary_restrictions = [d.strip() for d in user_result['diet'].split(',') if d.strip()]
-            print(f"🍽️ Applying dietary restrictions for user {user_id}: {', '.join(user_dietary_restrictions)}")
+            logger.debug("Applying dietary restrictions for user %s: %s", user_id, ', '.join(user_dietary_restrictions))
     
-    # normalize ingredient names
-    user_ingredients = [ing.lower().strip() for ing in ingredient_names]
+    # normalize ingredient names once for the whole search
+    user_set = frozenset(ing.lower().strip() for ing in ingredient_names)
     
     # base query to get all recipes
     base_query = """
@@ -181,24 +214,53 @@ def query_recipes_by_ingredients(ingredient_names: List[str], filters: Dict[str,
         base_query += " AND LOWER(r.\"desc\") LIKE LOWER(%s)"
         params.append(f"%{filters['cuisine']}%")
     
+    # only score recipes that share at least one ingredient with the user;
+    # anything else would come out at 0% and be dropped below anyway
+    base_query += """
+        AND r.r_id IN (
+            SELECT ui.r_id
+            FROM uses_ingredient ui
+            JOIN ingredients i ON ui.i_id = i.i_id
+            WHERE i.name = ANY(%s)
+        )
+    """
+    params.append(list(user_set))
+    
     base_query += " ORDER BY r.name;"
     
     recipes = execute_query(base_query, tuple(params), fetch_all=True)
     
-    # for each recipe, calculate match and check dietary restrictions
-    filtered_count = 0
-    for recipe in (recipes or []):
-        r_id = recipe['id']
-        
-        # get recipe ingredients
+    recipes = recipes or []
+    recipe_ids = [recipe['id'] for recipe in recipes]
+    
+    # fetch ingredients and equipment for every candidate in one round trip
+    # each, then score in memory, instead of two queries per recipe
+    ings_by_recipe = {}
+    equipment_by_recipe = {}
+    if recipe_ids:
         ing_query = """
-            SELECT i.name
+            SELECT ui.r_id, i.name
             FROM uses_ingredient ui
             JOIN ingredients i ON ui.i_id = i.i_id
-            WHERE ui.r_id = %s;
+            WHERE ui.r_id = ANY(%s);
         """
-        recipe_ings = execute_query(ing_query, (r_id,), fetch_all=True)
-        recipe_ing_names = [i['name'].lower() for i in (recipe_ings or [])]
+        for row in (execute_query(ing_query, (recipe_ids,), fetch_all=True) or []):
+            ings_by_recipe.setdefault(row['r_id'], []).append(row['name'].lower())
+        
+        equip_query = """
+            SELECT u.r_id, a.name
+            FROM uses u
+            JOIN appliance a ON u.name = a.name
+            WHERE u.r_id = ANY(%s);
+        """
+        for row in (execute_query(equip_query, (recipe_ids,), fetch_all=True) or []):
+            equipment_by_recipe.setdefault(row['r_id'], []).append(row['name'])
+    
+    # for each recipe, calculate match and check dietary restrictions
+    filtered_count = 0
+    for recipe in recipes:
+        r_id = recipe['id']
+        recipe_ing_names = ings_by_recipe.get(r_id, [])
         
         # apply dietary restriction filtering
         is_compatible = True
@@ -212,31 +274,19 @@ def query_recipes_by_ingredients(ingredient_names: List[str], filters: Dict[str,
             
             if not is_compatible:
                 filtered_count += 1
-                print(f"   ❌ Filtering out '{recipe['name']}': {[v['reason'] for v in violations]}")
-        
-        # get equipment
-        equip_query = """
-            SELECT a.name
-            FROM uses u
-            JOIN appliance a ON u.name = a.name
-            WHERE u.r_id = %s;
-        """
-        equipment = execute_query(equip_query, (r_id,), fetch_all=True)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Filtering out '%s': %s", recipe['name'], [v['reason'] for v in violations])
         
         # calculate match
-        matched = [ing for ing in recipe_ing_names if ing in user_ingredients]
-        missing = [ing for ing in recipe_ing_names if ing not in user_ingredients]
-        
-        total = len(recipe_ing_names)
-        percentage = (len(matched) / total * 100) if total > 0 else 0
+        match_data = _calculate_match(recipe_ing_names, user_set)
         
-        if percentage > 0:
+        if match_data['percentage'] > 0:
             recipe_data = {
                 'id': r_id,
                 'name': recipe['name'],
-                'match_percentage': round(percentage, 1),
-                'matched_ingredients': matched,
-                'missing_ingredients': missing,
+                'match_percentage': match_data['percentage'],
+                'matched_ingredients': match_data['matched'],
+                'missing_ingredients': match_data['missing'],
                 'prep_time': recipe.get('total_time', 0) // 2,
                 'cook_time': recipe.get('total_time', 0) // 2,
                 'total_time': recipe.get('total_time', 0),
@@ -245,7 +295,7 @@ def query_recipes_by_ingredients(ingredient_names: List[str], filters: Dict[str,
                 'cuisine': recipe.get('desc', ''),
                 'dietary_tags': [],
                 'violations': violations,
-                'equipment': [e['name'] for e in (equipment or [])]
+                'equipment': equipment_by_recipe.get(r_id, [])
             }
             
             if is_compatible:
@@ -268,7 +318,7 @@ def query_recipes_by_ingredients(ingredient_names: List[str], filters: Dict[str,
     filtered_results.sort(key=lambda x: x['match_percentage'], reverse=True)
     
     if filtered_count > 0:
-        print(f" Filtered out {filtered_count} recipes due to dietary restrictions")
+        logger.debug("Filtered out %d recipes due to dietary restrictions", filtered_count)
     
     return {
         'compatible': compatible_results,
@@ -287,25 +337,21 @@ def query_user_favorites(user_id: str) -> List[Dict[str, Any]]:
     favorites = execute_query(query, (user_id,), fetch_all=True)
     
     # get current pantry for match calculation
-    user_pantry = query_user_pantry(user_id)
-    user_ingredients = [ing['name'] for ing in user_pantry]
+    user_set = query_user_pantry_names(user_id)
     
     results = []
     for fav in (favorites or []):
         # get recipe ingredients for match calculation
         recipe = query_recipe_by_id(str(fav['id']))
         if recipe:
-            matched = [ing for ing in recipe['ingredients'] if ing in user_ingredients]
-            missing = [ing for ing in recipe['ingredients'] if ing not in user_ingredients]
-            total = len(recipe['ingredients'])
-            percentage = (len(matched) / total * 100) if total > 0 else 0
+            match_data = _calculate_match(recipe['ingredients'], user_set)
             
             results.append({
                 'id': fav['id'],
                 'name': fav['name'],
-                'match_percentage': round(percentage, 1),
-                'matched_ingredients': matched,
-                'missing_ingredients': missing
+                'match_percentage': match_data['percentage'],
+                'matched_ingredients': match_data['matched'],
+                'missing_ingredients': match_data['missing']
             })
     
     return results
@@ -314,11 +360,12 @@ def query_shopping_suggestions(user_id: str, filters: Dict[str, Any] = None, top
     # QUERY: get shopping suggestions based on current pantry from PostgreSQL
     filters = filters or {}
     
-    user_pantry = query_user_pantry(user_id)
-    user_ingredients = [ing['name'] for ing in user_pantry]
+    user_ingredients = query_user_pantry_names(user_id)
     
-    # get all recipes
+    # get all recipes (search returns compatible/filtered lists; only compatible count)
     all_recipes = query_recipes_by_ingredients(user_ingredients, filters)
+    if isinstance(all_recipes, dict):
+        all_recipes = all_recipes['compatible']
     
     # track ingredient impact
     ingredient_impact = {}
@@ -336,6 +383,37 @@ def query_shopping_suggestions(user_id: str, filters: Dict[str, Any] = None, top
                 ingredient_impact[missing_ing]['unlock_count'] += 1
                 ingredient_impact[missing_ing]['recipes'].append(recipe['name'])
     
-    # sort and limit
-    suggestions = sorted(ingredient_impact.values(), key=lambda x: x['unlock_count'], reverse=True)
-    return suggestions[:top_n]
\ No newline at end of file
+    # only the top few are returned, so select them without sorting everything
+    return heapq.nlargest(top_n, ingredient_impact.values(), key=lambda x: x['unlock_count'])
+
+def query_top_recipe_matches(user_id: str, top_n: int = 10) -> List[Dict[str, Any]]:
+    # QUERY: best-matching recipes for the user's pantry
+    # served from the event-maintained projection when it's warm, so a pantry
+    # change costs one inverted-index update instead of rescoring every recipe
+    matches = get_user_recipe_matches(user_id, top_n)
+    if matches is not None:
+        return matches
+    
+    # cold projection (no pantry events seen yet): aggregate in PostgreSQL
+    query = """
+        SELECT ui.r_id AS id,
+               COUNT(*) AS total,
+               COUNT(hi.i_id) AS matched
+        FROM uses_ingredient ui
+        LEFT JOIN has_ingredient hi ON hi.i_id = ui.i_id AND hi.u_id = %s
+        GROUP BY ui.r_id
+        HAVING COUNT(hi.i_id) > 0
+        ORDER BY COUNT(hi.i_id)::float / COUNT(*) DESC
+        LIMIT %s;
+    """
+    rows = execute_query(query, (user_id, top_n), fetch_all=True)
+    
+    return [
+        {
+            'id': r['id'],
+            'match_percentage': round(r['matched'] / r['total'] * 100, 1),
+            'matched_count': r['matched'],
+            'total_count': r['total']
+        }
+        for r in (rows or [])
+    ]
@@ -26,7 +26,7 @@ print_header() {
 # Check if pytest is installed
 if ! python3 -c "import pytest" 2>/dev/null; then
     echo "pytest not found. Installing testing dependencies..."
-    pip install -q pytest pytest-cov pytest-mock coverage
+    pip install -q pytest pytest-cov pytest-mock pytest-xdist coverage
     print_success "Testing dependencies installed"
 fi
 
@@ -1,142 +1,389 @@
+import heapq
 import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+# orjson parses the recipe file several times faster; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# parsed and normalized recipe catalogue, shared by every search in this process
+_recipes_cache = None
+# inverted index over that catalogue: ingredient -> positions of recipes using it,
+# one entry per occurrence so counting postings counts matched ingredients
+_recipes_index = {}
+# filter key -> positions of catalogue recipes passing those filters
+_filter_cache = {}
+FILTER_CACHE_SIZE = 256
+# (user ingredients, filter key, top_n) -> search_recipes results on the catalogue
+_search_cache = {}
+SEARCH_CACHE_SIZE = 1024
+
+# catalogues at least this big are scored across worker processes; below it
+# pickling recipes to the workers costs more than the scoring itself
+PARALLEL_MIN_RECIPES = 5000
+_executor = None
 
 def load_recipes():
     # load recipes from a JSON file
-    with open('data/recipes.json', 'r') as file:
-        data = json.load(file)
-    return data['recipes']
+    # the file is read once; later calls share the same normalized recipe dicts,
+    # so callers must treat them as read-only
+    global _recipes_cache, _recipes_index
+    if _recipes_cache is None:
+        with open('data/recipes.json', 'rb') as file:
+            data = orjson.loads(file.read()) if orjson else json.load(file)
+        
+        # normalize once here so searches don't re-lowercase every recipe
+        index = {}
+        for position, recipe in enumerate(data['recipes']):
+            _normalize_recipe(recipe)
+            for ing in recipe['_ingredients_lc']:
+                index.setdefault(ing, []).append(position)
+        _recipes_index = index
+        _filter_cache.clear()
+        _search_cache.clear()
+        _recipes_cache = data['recipes']
+    return _recipes_cache
+
+def _filter_key(filters):
+    # hashable form of the filters compile_filters acts on (list values become
+    # tuples). unknown names and unset values are left out, as the filters
+    # ignore them too. raises TypeError if a value can't be hashed
+    key = tuple(
+        (name, tuple(filters[name]) if isinstance(filters[name], list) else filters[name])
+        for name in ('max_time', 'skill_level', 'dietary_tags', 'cuisine')
+        if filters.get(name)
+    )
+    hash(key)
+    return key
+
+def _remember(cache, size, key, value):
+    # stores value under key, dropping the oldest entries once cache holds size
+    while cache and len(cache) >= size:
+        del cache[next(iter(cache))]
+    cache[key] = value
+    return value
+
+def _filter_positions(filters):
+    # positions of catalogue recipes passing the filters, computed once per
+    # distinct filter set so repeat searches skip the per-recipe checks
+    try:
+        key = _filter_key(filters)
+    except TypeError:
+        # unhashable filter values can't be cached
+        key = None
+    
+    if key is not None and key in _filter_cache:
+        return _filter_cache[key]
+    
+    passes = compile_filters(filters)
+    positions = frozenset(i for i, recipe in enumerate(_recipes_cache) if passes(recipe))
+    if key is None:
+        return positions
+    return _remember(_filter_cache, FILTER_CACHE_SIZE, key, positions)
+
+def _catalogue_scores(user_set, filters=None, exclude_ids=frozenset(), indexed=True):
+    # (percentage, recipe) for shared-catalogue recipes passing the filters, in
+    # catalogue order. matched counts for the whole catalogue come from one
+    # C-level Counter pass over the user's postings, so no recipe's ingredient
+    # list is walked. indexed=True keeps only recipes sharing an ingredient
+    counts = Counter()
+    for ing in user_set:
+        counts.update(_recipes_index.get(ing, ()))
+    
+    positions = counts if indexed else range(len(_recipes_cache))
+    keep = _filter_positions(filters) if filters else None
+    
+    scored = []
+    for position in sorted(positions):
+        if keep is not None and position not in keep:
+            continue
+        
+        recipe = _recipes_cache[position]
+        if recipe['id'] in exclude_ids:
+            continue
+        
+        # same rounding as calculate_match
+        total = len(recipe['_ingredients_lc'])
+        percentage = round(counts[position] / total * 100, 1) if total else 0
+        scored.append((percentage, recipe))
+    return scored
+
+def _normalize_recipe(recipe):
+    # cache lowercased copies of the fields the filters and matcher compare against
+    recipe['_ingredients_lc'] = tuple(ing.lower() for ing in recipe.get('ingredients', []))
+    recipe['_skill_lc'] = recipe.get('skill_level', '').lower()
+    recipe['_cuisine_lc'] = recipe.get('cuisine', '').lower()
+    recipe['_tags_lc_set'] = frozenset(tag.lower() for tag in recipe.get('dietary_tags', []))
+    return recipe
+
+def _normalized(recipe):
+    # recipes that didn't come through load_recipes get normalized on first use
+    if '_ingredients_lc' not in recipe:
+        _normalize_recipe(recipe)
+    return recipe
 
 def calculate_match(recipe_ingredients, user_ingredients):
     # calculates how well a recipe matches the user's ingredients
     # returns match percentage, matched ingredients and missing ingredients
+    # comparison is case-insensitive on both sides
 
-    # normalize
-    lower_rec_ings = [ing.lower() for ing in recipe_ingredients]
+    # normalize each side once, before any comparison
+    lower_rec_ings = tuple(ing.lower() for ing in recipe_ingredients)
+    lower_user_ings = frozenset(ing.lower() for ing in user_ingredients)
+    return _calculate_match_lc(lower_rec_ings, lower_user_ings)
 
-    # ingredient lists
-    matched = []
-    missing = []
+def calculate_recipe_match(recipe, user_ingredients):
+    # calculate_match for a recipe dict, using its cached lowercased ingredients
+    lower_user_ings = frozenset(ing.lower() for ing in user_ingredients)
+    return _calculate_match_lc(_normalized(recipe)['_ingredients_lc'], lower_user_ings)
 
-    # check each recipe ingredient
-    for recipe_ing in lower_rec_ings:
-        if recipe_ing in user_ingredients:
-            matched.append(recipe_ing)
-        else:
-            missing.append(recipe_ing)
+def _calculate_match_lc(lower_rec_ings, user_ingredients):
+    # calculate_match for ingredients that are already lowercased on both sides
+    # (recipe side a tuple, so the result can be memoized); pass user_ingredients
+    # as a frozenset when scoring many recipes so it isn't rebuilt per call
+    if not isinstance(user_ingredients, frozenset):
+        user_ingredients = frozenset(user_ingredients)
+    
+    percentage, matched, missing = _match_core(tuple(lower_rec_ings), user_ingredients)
+    
+    # fresh lists per call so callers can't edit the cached result
+    return {
+        'percentage': percentage,
+        'matched': list(matched),
+        'missing': list(missing)
+    }
+
+@lru_cache(maxsize=8192)
+def _match_core(lower_rec_ings, user_ingredients):
+    # (percentage, matched, missing) for one recipe against one user set
+    # the catalogue is fixed, so the same pair recurs across repeated searches
+    # matched/missing keep recipe order (and any repeated ingredients)
+    matched = tuple(ing for ing in lower_rec_ings if ing in user_ingredients)
+    missing = tuple(ing for ing in lower_rec_ings if ing not in user_ingredients)
 
     # calculate precentage
     total = len(lower_rec_ings)
-    match_count = len(matched)
-    percentage = (match_count/total*100) if total > 0 else 0
+    percentage = (len(matched)/total*100) if total > 0 else 0
 
-    return {
-        'percentage': round(percentage, 1),
-        'matched': matched,
-        'missing': missing
-    }
+    return round(percentage, 1), matched, missing
+
+def compile_filters(filters):
+    # builds a recipe -> bool predicate for one search
+    # filter values are looked up and lowercased once here instead of per recipe
+    filters = filters or {}
+    
+    max_time = filters.get('max_time') or None
+    skill_lc = filters['skill_level'].lower() if filters.get('skill_level') else None
+    # recipe must have ALL specified tags
+    req_tags = frozenset(tag.lower() for tag in (filters.get('dietary_tags') or ()))
+    cuisine_lc = filters['cuisine'].lower() if filters.get('cuisine') else None
+    
+    # one closure per filter that is actually set
+    checks = []
+    if max_time is not None:
+        checks.append(lambda recipe: recipe.get('total_time', 999) <= max_time)
+    if skill_lc is not None:
+        checks.append(lambda recipe: _normalized(recipe)['_skill_lc'] == skill_lc)
+    if req_tags:
+        checks.append(lambda recipe: req_tags.issubset(_normalized(recipe)['_tags_lc_set']))
+    if cuisine_lc is not None:
+        checks.append(lambda recipe: _normalized(recipe)['_cuisine_lc'] == cuisine_lc)
+    
+    if not checks:
+        return lambda recipe: True
+    if len(checks) == 1:
+        # the common single-filter search runs just its own check
+        return checks[0]
+    
+    # several filters: one fused function is cheaper than calling each check
+    # cheapest checks first (int compare, then string equality, then the tag
+    # subset) so a failing recipe is rejected before the costlier ones run
+    def predicate(recipe):
+        _normalized(recipe)
+        
+        return (
+            (max_time is None or recipe.get('total_time', 999) <= max_time)
+            and (skill_lc is None or recipe['_skill_lc'] == skill_lc)
+            and (cuisine_lc is None or recipe['_cuisine_lc'] == cuisine_lc)
+            and (not req_tags or req_tags.issubset(recipe['_tags_lc_set']))
+        )
+    
+    return predicate
 
 def passes_filters(recipe, filters):
     #check if a recipe passes all specified filters
-    if not filters:
-        return True
-    
-    # filter by maximum time
-    if 'max_time' in filters and filters['max_time']:
-        if recipe.get('total_time', 999) > filters['max_time']:
-            return False
-    
-    # filter by skill level
-    if 'skill_level' in filters and filters['skill_level']:
-        if recipe.get('skill_level', '').lower() != filters['skill_level'].lower():
-            return False
-    
-    # filter by dietary tags (recipe must have ALL specified tags)
-    if 'dietary_tags' in filters and filters['dietary_tags']:
-        recipe_tags = [tag.lower() for tag in recipe.get('dietary_tags', [])]
-        required_tags = [tag.lower() for tag in filters['dietary_tags']]
+    return compile_filters(filters)(recipe)
+
+def _match_percentage(recipe_ingredients, user_ingredients):
+    # cheap first pass: the match percentage alone, without building the
+    # matched/missing lists (same rounding as calculate_match)
+    # recipe_ingredients must already be lowercased, user_ingredients a set
+    total = len(recipe_ingredients)
+    
+    # most recipes share nothing with the user; isdisjoint rejects those in C
+    if not total or user_ingredients.isdisjoint(recipe_ingredients):
+        return 0
+    
+    # count hits with a C-level map instead of a Python generator loop
+    match_count = sum(map(user_ingredients.__contains__, recipe_ingredients))
+    return round(match_count / total * 100, 1)
+
+def _score_chunk(recipes, user_set, filters, exclude_ids):
+    # scores one shard as (percentage, index) pairs for recipes passing the filters
+    # module-level rather than a closure so worker processes can run it
+    passes = compile_filters(filters)
+    hits = []
+    for index, recipe in enumerate(recipes):
+        if recipe['id'] in exclude_ids or not passes(recipe):
+            continue
         
-        for required_tag in required_tags:
-            if required_tag not in recipe_tags:
-                return False
+        percentage = _match_percentage(_normalized(recipe)['_ingredients_lc'], user_set)
+        hits.append((percentage, index))
+    return hits
+
+def _get_executor():
+    # worker pool is started on first use and reused for later searches
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor()
+    return _executor
+
+def _score_recipes(recipes, user_set, filters=None, exclude_ids=frozenset()):
+    # (percentage, recipe) for every recipe passing the filters, in catalogue order
+    recipes = recipes if isinstance(recipes, list) else list(recipes)
+    if len(recipes) < PARALLEL_MIN_RECIPES:
+        hits = _score_chunk(recipes, user_set, filters, exclude_ids)
+        return [(percentage, recipes[i]) for percentage, i in hits]
     
-    # filter by cuisine
-    if 'cuisine' in filters and filters['cuisine']:
-        if recipe.get('cuisine', '').lower() != filters['cuisine'].lower():
-            return False
+    # shard across cores; workers send back only indices and percentages
+    size = -(-len(recipes) // (os.cpu_count() or 1))
+    starts = range(0, len(recipes), size)
+    score = partial(_score_chunk, user_set=user_set, filters=filters, exclude_ids=exclude_ids)
     
-    return True
+    scored = []
+    for start, hits in zip(starts, _get_executor().map(score, [recipes[i:i + size] for i in starts])):
+        scored.extend((percentage, recipes[start + i]) for percentage, i in hits)
+    return scored
 
-def search_recipes(user_ingredients, recipes, filters=None):
+def _rank_scored(scored, top_n=None):
+    # best (percentage, recipe) pairs first; with top_n only that many are
+    # selected, not a full sort. ties keep catalogue order either way
+    if top_n is not None:
+        return heapq.nlargest(top_n, scored, key=lambda x: x[0])
+    
+    return sorted(scored, key=lambda x: x[0], reverse=True)
+
+def search_recipes(user_ingredients, recipes, filters=None, top_n=None):
     # searches through recipes and ranks them by match percentage
-    results = []
+    # top_n limits the result to the best few matches
+    # searches of the shared catalogue are cached, so repeating one (e.g. a
+    # refresh) skips scoring
+    # recipe ingredients are stored lowercased, so the user's are matched the same way
+    user_set = frozenset(ingredient.lower() for ingredient in user_ingredients)
+    if recipes is not _recipes_cache:
+        return _search_recipes(user_set, recipes, filters, top_n)
+    
+    try:
+        key = (user_set, _filter_key(filters or {}), top_n)
+    except TypeError:
+        # unhashable filter values can't be cached
+        return _search_recipes(user_set, recipes, filters, top_n)
+    
+    results = _search_cache.get(key)
+    if results is None:
+        results = _remember(_search_cache, SEARCH_CACHE_SIZE, key,
+                            _search_recipes(user_set, recipes, filters, top_n))
+    
+    # fresh dicts and lists each call, so one caller editing its results
+    # can't change what later searches return
+    return [_copy_result(result) for result in results]
 
-    for recipe in recipes:
-        # first check if recipe passes filters
-        if not passes_filters(recipe, filters):
-            continue
-        
-        # then calculate ingredient match
-        match_data = calculate_match(recipe['ingredients'], user_ingredients)
-        
-        # only include recipes with at least some match
-        if match_data['percentage'] > 0:
-            results.append({
-                'id': recipe['id'],
-                'name': recipe['name'],
-                'match_percentage': match_data['percentage'],
-                'matched_ingredients': match_data['matched'],
-                'missing_ingredients': match_data['missing'],
-                'prep_time': recipe.get('prep_time', 0),
-                'cook_time': recipe.get('cook_time', 0),
-                'total_time': recipe.get('total_time', 0),
-                'servings': recipe.get('servings', 0),
-                'skill_level': recipe.get('skill_level', 'unknown'),
-                'cuisine': recipe.get('cuisine', 'unknown'),
-                'dietary_tags': recipe.get('dietary_tags', []),
-                'equipment': recipe.get('equipment', [])
-            })
-
-    # sort by match percentage descending
-    results.sort(key=lambda x: x['match_percentage'], reverse=True)
+def _copy_result(result):
+    # copy of a search result dict with its list fields copied too
+    return {name: list(value) if isinstance(value, list) else value for name, value in result.items()}
+
+def _search_recipes(user_set, recipes, filters=None, top_n=None):
+    # uncached search behind search_recipes, given the lowercased user
+    # ingredients as a frozenset so each membership test is O(1)
+
+    # filter and score every recipe, only including those with at least some match
+    # (so catalogue recipes sharing no ingredient can be skipped up front)
+    if recipes is _recipes_cache:
+        scored = _catalogue_scores(user_set, filters)
+    else:
+        scored = _score_recipes(recipes, user_set, filters)
+    scored = [(percentage, recipe) for percentage, recipe in scored if percentage > 0]
+
+    # sort by match percentage descending, then build full results only for
+    # the recipes actually returned
+    results = []
+    for percentage, recipe in _rank_scored(scored, top_n):
+        # user_set is already lowercased, so skip calculate_recipe_match's pass
+        match_data = _calculate_match_lc(_normalized(recipe)['_ingredients_lc'], user_set)
+        results.append({
+            'id': recipe['id'],
+            'name': recipe['name'],
+            'match_percentage': match_data['percentage'],
+            'matched_ingredients': match_data['matched'],
+            'missing_ingredients': match_data['missing'],
+            'prep_time': recipe.get('prep_time', 0),
+            'cook_time': recipe.get('cook_time', 0),
+            'total_time': recipe.get('total_time', 0),
+            'servings': recipe.get('servings', 0),
+            'skill_level': recipe.get('skill_level', 'unknown'),
+            'cuisine': recipe.get('cuisine', 'unknown'),
+            'dietary_tags': recipe.get('dietary_tags', []),
+            'equipment': recipe.get('equipment', [])
+        })
 
     return results
 
-def find_partial_matches(user_ingredients, recipes, filters=None, min_match_threshold=50, exclude_ids=None):
+def find_partial_matches(user_ingredients, recipes, filters=None, min_match_threshold=50, exclude_ids=None, top_n=None):
     # finds recipes that partially match user ingredients.
     # close enough recipes worth suggesting.
+    # top_n limits the result to the closest few
     
     if exclude_ids is None:
         exclude_ids = set()
     
-    partial_matches = []
+    # one hash set per search so each membership test is O(1), not a list
+    # scan, lowercased to match the stored recipe ingredients
+    user_set = frozenset(ingredient.lower() for ingredient in user_ingredients)
     
-    for recipe in recipes:
-        # skip recipes that were already shown
-        if recipe['id'] in exclude_ids:
-            continue
-        
-        # apply filters first
-        if not passes_filters(recipe, filters):
-            continue
-        
-        # calculate match
-        match_data = calculate_match(recipe['ingredients'], user_ingredients)
-        
-        # only consider recipes above threshold but not perfect matches
-        if min_match_threshold <= match_data['percentage'] < 100:
-            partial_matches.append({
-                'id': recipe['id'],
-                'name': recipe['name'],
-                'match_percentage': match_data['percentage'],
-                'matched_ingredients': match_data['matched'],
-                'missing_ingredients': match_data['missing'],
-                'total_time': recipe.get('total_time', 0),
-                'skill_level': recipe.get('skill_level', 'unknown'),
-                'cuisine': recipe.get('cuisine', 'unknown')
-            })
-    
-    # sort by match percentage (closest matches first)
-    partial_matches.sort(key=lambda x: x['match_percentage'], reverse=True)
+    # skip recipes that were already shown, apply filters, then only consider
+    # recipes above threshold but not perfect matches
+    # (a positive threshold rules out recipes sharing no ingredient)
+    if recipes is _recipes_cache:
+        scored = _catalogue_scores(user_set, filters, exclude_ids, indexed=min_match_threshold > 0)
+    else:
+        scored = _score_recipes(recipes, user_set, filters, exclude_ids)
+    scored = [
+        (percentage, recipe)
+        for percentage, recipe in scored
+        if min_match_threshold <= percentage < 100
+    ]
+    
+    # sort by match percentage (closest matches first), then build the
+    # matched/missing lists only for the recipes returned
+    partial_matches = []
+    for percentage, recipe in _rank_scored(scored, top_n):
+        # user_set is already lowercased, so skip calculate_recipe_match's pass
+        match_data = _calculate_match_lc(_normalized(recipe)['_ingredients_lc'], user_set)
+        partial_matches.append({
+            'id': recipe['id'],
+            'name': recipe['name'],
+            'match_percentage': match_data['percentage'],
+            'matched_ingredients': match_data['matched'],
+            'missing_ingredients': match_data['missing'],
+            'total_time': recipe.get('total_time', 0),
+            'skill_level': recipe.get('skill_level', 'unknown'),
+            'cuisine': recipe.get('cuisine', 'unknown')
+        })
     
     return partial_matches
 
@@ -2,6 +2,7 @@
 Ingredient Substitution System
 Maps problematic ingredients to dietary-appropriate substitutes
 """
+from functools import lru_cache
 
 # Comprehensive substitution database
 SUBSTITUTIONS = {
@@ -350,6 +351,25 @@ SUBSTITUTIONS = {
     }
 }
 
+def _build_substitute_index():
+    # lowercased ingredient -> (its substitutes, restriction -> positions of the
+    # substitutes suited to it). built once at import, so a lookup is one dict
+    # get on the lowercased query and a few small set intersections
+    index = {}
+    for ingredient, data in SUBSTITUTIONS.items():
+        substitutes = tuple(data['substitutes'])
+        by_restriction = {}
+        for position, sub in enumerate(substitutes):
+            for restriction in sub['best_for']:
+                by_restriction.setdefault(restriction, set()).add(position)
+        index[ingredient.lower().strip()] = (
+            substitutes,
+            {r: frozenset(p) for r, p in by_restriction.items()}
+        )
+    return index
+
+_SUBSTITUTE_INDEX = _build_substitute_index()
+
 def get_substitutions_for_ingredient(ingredient_name, dietary_restrictions):
     """
     Get appropriate substitutions for an ingredient based on dietary restrictions
@@ -361,26 +381,35 @@ def get_substitutions_for_ingredient(ingredient_name, dietary_restrictions):
     Returns:
         List of appropriate substitutes
     """
+    # normalized so every spelling of the same question shares one cache entry;
+    # a new list each call so callers can't change the cached answer
     ingredient_lower = ingredient_name.lower().strip()
-    
-    if ingredient_lower not in SUBSTITUTIONS:
+    try:
+        restrictions = frozenset(dietary_restrictions)
+    except TypeError:
+        # an unhashable restriction can't equal any best_for name, so nothing fits
         return []
+    return list(_get_substitutions_cached(ingredient_lower, restrictions))
+
+@lru_cache(maxsize=256)
+def _get_substitutions_cached(ingredient_lower, dietary_restrictions):
+    # substitutes of one ingredient suitable for every restriction, as a tuple
+    entry = _SUBSTITUTE_INDEX.get(ingredient_lower)
+    if entry is None:
+        return ()
     
-    all_substitutes = SUBSTITUTIONS[ingredient_lower]['substitutes']
+    all_substitutes, by_restriction = entry
     
     # FIXED: Use AND logic - substitute must be compatible with ALL restrictions
-    appropriate_subs = []
-    for sub in all_substitutes:
-        # Check if this substitute is marked as suitable for ALL user restrictions
-        is_compatible = all(
-            restriction in sub['best_for'] 
-            for restriction in dietary_restrictions
-        )
-        
-        if is_compatible:
-            appropriate_subs.append(sub)
+    # intersect the precomputed positions suited to each restriction
+    positions = range(len(all_substitutes))
+    for restriction in dietary_restrictions:
+        positions = by_restriction.get(restriction, frozenset()).intersection(positions)
+        if not positions:
+            return ()
     
-    return appropriate_subs
+    # keep the catalogue order of the substitutes
+    return tuple(all_substitutes[i] for i in sorted(positions))
 
 def format_substitution_display(substitute):
     # format a substitution for display
@@ -1,4 +1,8 @@
-from services.recipe_matcher import find_partial_matches, calculate_match, passes_filters
+import logging
+from collections import Counter, defaultdict
+from services.recipe_matcher import find_partial_matches, calculate_recipe_match, compile_filters
+
+logger = logging.getLogger(__name__)
 
 def generate_shopping_suggestions(user_ingredients, recipes, filters=None, top_n=5, has_matches=True, exclude_ids=None):
     # analyzes which ingredients would unlock the most new recipes
@@ -11,8 +15,6 @@ def generate_shopping_suggestions(user_ingredients, recipes, filters=None, top_n
     if exclude_ids is None:
         exclude_ids = set()
     
-    ingredient_impact = {}
-    
     if has_matches:
         # strat 1: user has SOME matches; look for close recipes (50%+)
         partial_matches = find_partial_matches(
@@ -37,20 +39,23 @@ def generate_shopping_suggestions(user_ingredients, recipes, filters=None, top_n
         # strat 2: User has ZERO matches; analyze all filtered recipes
         # find ingredients that appear most frequently across all recipes
         
-        print("\n Analyzing ALL recipes to find the most useful ingredients...")
+        logger.debug("Analyzing ALL recipes to find the most useful ingredients")
         
         partial_matches = []
+        passes = compile_filters(filters)
+        # lowercased like the recipe side, so 'Chicken' counts as owned
+        user_set = frozenset(ing.lower() for ing in user_ingredients)
         for recipe in recipes:
             # skip recipes already shown
             if recipe['id'] in exclude_ids:
                 continue
             
             # still apply filters
-            if not passes_filters(recipe, filters):
+            if not passes(recipe):
                 continue
             
             # just grab the recipe
-            match_data = calculate_match(recipe['ingredients'], user_ingredients)
+            match_data = calculate_recipe_match(recipe, user_set)
             
             partial_matches.append({
                 'id': recipe['id'],
@@ -64,23 +69,23 @@ def generate_shopping_suggestions(user_ingredients, recipes, filters=None, top_n
             })
     
     # count missing ingredient frequency across candidate recipes
+    unlock_counts = Counter()
+    recipe_names = defaultdict(list)
     for recipe in partial_matches:
+        unlock_counts.update(recipe['missing_ingredients'])
         for missing_ing in recipe['missing_ingredients']:
-            if missing_ing not in ingredient_impact:
-                ingredient_impact[missing_ing] = {
-                    'name': missing_ing,
-                    'unlock_count': 0,
-                    'recipe_names': []
-                }
-            
-            ingredient_impact[missing_ing]['unlock_count'] += 1
-            ingredient_impact[missing_ing]['recipe_names'].append(recipe['name'])
-    
-    # convert to list and sort by unlock count
-    suggestions = list(ingredient_impact.values())
-    suggestions.sort(key=lambda x: x['unlock_count'], reverse=True)
+            recipe_names[missing_ing].append(recipe['name'])
     
-    return suggestions[:top_n]
+    # most_common picks the top ingredients without sorting the rest;
+    # result dicts are only built for those
+    return [
+        {
+            'name': missing_ing,
+            'unlock_count': count,
+            'recipe_names': recipe_names[missing_ing]
+        }
+        for missing_ing, count in unlock_counts.most_common(top_n)
+    ]
 
 def display_suggestions(suggestions, partial_matches=None):
     # displays shopping suggestions and partial matches
@@ -2,11 +2,11 @@
 Pytest configuration and shared fixtures for SmartFridge tests
 """
 import pytest
-import sys
-import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock, create_autospec
 
-# Add project root to Python path so tests can import modules
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from services.recipe_matcher import _normalize_recipe
+from events.event_bus import EventBus
 
 
 @pytest.fixture
@@ -28,7 +28,7 @@ def sample_recipe():
 @pytest.fixture
 def sample_recipes():
     """Multiple sample recipes for testing"""
-    return [
+    recipes = [
         {
             'id': 1,
             'name': 'Chicken Fried Rice',
@@ -57,6 +57,12 @@ def sample_recipes():
             'dietary_tags': ['vegetarian', 'vegan']
         }
     ]
+    
+    # lowercase the matcher's lookup fields once here, as load_recipes does
+    # for the real catalogue, instead of inside the first search of each test
+    for recipe in recipes:
+        _normalize_recipe(recipe)
+    return recipes
 
 
 @pytest.fixture
@@ -72,4 +78,55 @@ def master_ingredient_list():
         'chicken', 'rice', 'soy sauce', 'garlic', 'eggs',
         'bread', 'cheese', 'butter', 'broccoli', 'carrots',
         'oil', 'onion', 'tomato', 'lettuce', 'pasta'
-    ]
\ No newline at end of file
+    ]
+
+@pytest.fixture(scope='module')
+def _prototype_mocks():
+    """Handler dependency mocks, built once per test module"""
+    return {
+        'execute_query': MagicMock(),
+        'execute_update': MagicMock(),
+        # spec'd once here, so a misspelled method fails instead of passing silently
+        'event_bus': create_autospec(EventBus, instance=True)
+    }
+
+
+@pytest.fixture
+def handler_mocks(_prototype_mocks, monkeypatch):
+    """Swap command/auth handler database and event bus for the shared mocks
+
+    The mocks are reset rather than rebuilt for each test; set
+    return_value/side_effect on them in the test body as usual.
+    """
+    import commands.command_handlers as command_handlers
+    import commands.auth_handlers as auth_handlers
+    
+    for mock in _prototype_mocks.values():
+        mock.reset_mock(return_value=True, side_effect=True)
+    
+    # plain attribute swaps; monkeypatch restores them after the test
+    for module in (command_handlers, auth_handlers):
+        for name in ('execute_query', 'execute_update', 'event_bus'):
+            monkeypatch.setattr(module, name, _prototype_mocks[name])
+    
+    return SimpleNamespace(**_prototype_mocks)
+
+
+@pytest.fixture
+def fake_verify(monkeypatch):
+    """Replace verify_password with a lookup of known (password, hash) pairs
+
+    Pairs not in the returned table fail verification; tests may add more.
+    """
+    import commands.auth_handlers as auth_handlers
+    
+    table = {
+        ('correctpass', 'hashed_password'): True,
+        ('oldpass', 'old_hash'): True
+    }
+    
+    def verify(password, hashed):
+        return table.get((password, hashed), False)
+    
+    monkeypatch.setattr(auth_handlers, 'verify_password', verify)
+    return table
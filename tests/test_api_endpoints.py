@@ -5,11 +5,6 @@ Tests all Flask API routes with mocked database operations
 import pytest
 import json
 from unittest.mock import patch, MagicMock
-import sys
-import os
-
-# Add project root to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the Flask app
 try:
@@ -256,6 +251,41 @@ class TestRecipeEndpoints:
         response = client.get('/api/recipes/9999')
         assert response.status_code == 404
 
+    
+    def test_recipe_matches_requires_auth(self, client):
+        """Recipe matches endpoint should require authentication"""
+        response = client.get('/api/recipes/matches')
+        assert response.status_code == 401
+    
+    @patch('api.query_top_recipe_matches')
+    def test_recipe_matches_for_current_user(self, mock_matches, client):
+        """Test top pantry matches are served for the logged-in user"""
+        mock_matches.return_value = [
+            {'id': 1, 'match_percentage': 100.0, 'matched_count': 2, 'total_count': 2}
+        ]
+        with client.session_transaction() as sess:
+            sess['user_id'] = 'user-123'
+        
+        response = client.get('/api/recipes/matches?top_n=3')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['count'] == 1
+        mock_matches.assert_called_once_with('user-123', 3)
+    
+    @pytest.mark.parametrize('top_n, expected', [('abc', 10), ('0', 1), ('-5', 1), ('1000', 50)])
+    @patch('api.query_top_recipe_matches')
+    def test_recipe_matches_bad_top_n(self, mock_matches, client, top_n, expected):
+        """Test that a non-numeric or out-of-range top_n is defaulted or clamped, not a 500"""
+        mock_matches.return_value = []
+        with client.session_transaction() as sess:
+            sess['user_id'] = 'user-123'
+        
+        response = client.get(f'/api/recipes/matches?top_n={top_n}')
+        
+        assert response.status_code == 200
+        mock_matches.assert_called_once_with('user-123', expected)
+
 
 class TestIngredientEndpoints:
     """Test ingredient management endpoints (requires auth)"""
@@ -3,70 +3,72 @@ Unit Tests for Command Handlers
 Tests write operations with mocked database
 """
 import pytest
-from unittest.mock import patch, MagicMock
-import sys
-import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# skip the whole module once if the handlers can't be imported
+command_handlers = pytest.importorskip('commands.command_handlers')
+auth_handlers = pytest.importorskip('commands.auth_handlers')
 
-try:
-    from commands.command_handlers import (
-        handle_add_ingredient,
-        handle_remove_ingredient,
-        handle_favorite_recipe,
-        handle_unfavorite_recipe,
-        handle_update_appliances
-    )
-    from commands.auth_handlers import (
-        handle_register_user,
-        handle_login_user,
-        handle_update_user_password
-    )
-    COMMANDS_AVAILABLE = True
-except ImportError:
-    COMMANDS_AVAILABLE = False
-    pytest.skip("Command handlers not available", allow_module_level=True)
+handle_add_ingredient = command_handlers.handle_add_ingredient
+handle_remove_ingredient = command_handlers.handle_remove_ingredient
+handle_favorite_recipe = command_handlers.handle_favorite_recipe
+handle_unfavorite_recipe = command_handlers.handle_unfavorite_recipe
+handle_update_appliances = command_handlers.handle_update_appliances
+handle_create_user = command_handlers.handle_create_user
+handle_register_user = auth_handlers.handle_register_user
+handle_login_user = auth_handlers.handle_login_user
+handle_update_user_password = auth_handlers.handle_update_user_password
+
+# every test runs against mocked database and event bus (see conftest.handler_mocks)
+pytestmark = pytest.mark.usefixtures('handler_mocks')
+
+# canned execute_query rows, picked by a fragment of the SQL
+USER_ROW = {'u_id': 'user-123'}
+INGREDIENT_ROW = {'i_id': 1}
+
+
+def answer_queries(responses):
+    """side_effect for execute_query that answers by SQL fragment, not call order"""
+    def dispatch(sql, *args, **kwargs):
+        for fragment, response in responses.items():
+            if fragment in sql:
+                return response
+        return None
+    return dispatch
 
 
 class TestAddIngredient:
     """Test adding ingredients to user pantry"""
     
-    @patch('commands.command_handlers.execute_update')
-    @patch('commands.command_handlers.execute_query')
-    def test_add_new_ingredient(self, mock_query, mock_update):
+    def test_add_new_ingredient(self, handler_mocks):
         """Test adding a new ingredient"""
-        # Mock user exists
-        mock_query.side_effect = [
-            {'u_id': 'user-123'},  # user exists
-            None,  # ingredient doesn't exist
-            {'i_id': 1}  # new ingredient created
-        ]
-        mock_update.return_value = 1
+        # Mock user exists, ingredient doesn't exist until it is created
+        handler_mocks.execute_query.side_effect = answer_queries({
+            'FROM "user"': USER_ROW,
+            'INSERT INTO ingredients': INGREDIENT_ROW
+        })
+        handler_mocks.execute_update.return_value = 1
         
         result = handle_add_ingredient('user-123', 'chicken', 2.0)
         
         assert result['success'] is True
         assert 'ingredient_id' in result
     
-    @patch('commands.command_handlers.execute_query')
-    def test_add_ingredient_user_not_found(self, mock_query):
+    def test_add_ingredient_user_not_found(self, handler_mocks):
         """Test adding ingredient when user doesn't exist"""
-        mock_query.return_value = None
+        handler_mocks.execute_query.return_value = None
         
         result = handle_add_ingredient('nonexistent', 'chicken', 1.0)
         
         assert result['success'] is False
         assert 'not found' in result['message'].lower()
     
-    @patch('commands.command_handlers.execute_update')
-    @patch('commands.command_handlers.execute_query')
-    def test_add_ingredient_with_expiration(self, mock_query, mock_update):
+    def test_add_ingredient_with_expiration(self, handler_mocks):
         """Test adding ingredient with expiration date"""
-        mock_query.side_effect = [
-            {'u_id': 'user-123'},
-            {'i_id': 1}
-        ]
-        mock_update.return_value = 1
+        handler_mocks.execute_query.side_effect = answer_queries({
+            'FROM "user"': USER_ROW,
+            'FROM ingredients': INGREDIENT_ROW
+        })
+        handler_mocks.execute_update.return_value = 1
         
         result = handle_add_ingredient('user-123', 'milk', 1.0, exp_date='2024-12-31')
         
@@ -76,19 +78,17 @@ class TestAddIngredient:
 class TestRemoveIngredient:
     """Test removing ingredients from pantry"""
     
-    @patch('commands.command_handlers.execute_update')
-    def test_remove_existing_ingredient(self, mock_update):
+    def test_remove_existing_ingredient(self, handler_mocks):
         """Test removing an existing ingredient"""
-        mock_update.return_value = 1  # 1 row deleted
+        handler_mocks.execute_update.return_value = 1  # 1 row deleted
         
         result = handle_remove_ingredient('user-123', '1')
         
         assert result['success'] is True
     
-    @patch('commands.command_handlers.execute_update')
-    def test_remove_nonexistent_ingredient(self, mock_update):
+    def test_remove_nonexistent_ingredient(self, handler_mocks):
         """Test removing ingredient that doesn't exist"""
-        mock_update.return_value = 0  # 0 rows deleted
+        handler_mocks.execute_update.return_value = 0  # 0 rows deleted
         
         result = handle_remove_ingredient('user-123', '999')
         
@@ -98,19 +98,17 @@ class TestRemoveIngredient:
 class TestFavoriteRecipe:
     """Test favoriting recipes"""
     
-    @patch('commands.command_handlers.execute_update')
-    def test_favorite_new_recipe(self, mock_update):
+    def test_favorite_new_recipe(self, handler_mocks):
         """Test favoriting a recipe for the first time"""
-        mock_update.return_value = 1
+        handler_mocks.execute_update.return_value = 1
         
         result = handle_favorite_recipe('user-123', '1', 'Test Recipe')
         
         assert result['success'] is True
     
-    @patch('commands.command_handlers.execute_update')
-    def test_favorite_already_favorited(self, mock_update):
+    def test_favorite_already_favorited(self, handler_mocks):
         """Test favoriting an already favorited recipe"""
-        mock_update.return_value = 0  # ON CONFLICT DO NOTHING
+        handler_mocks.execute_update.return_value = 0  # ON CONFLICT DO NOTHING
         
         result = handle_favorite_recipe('user-123', '1', 'Test Recipe')
         
@@ -120,19 +118,17 @@ class TestFavoriteRecipe:
 class TestUnfavoriteRecipe:
     """Test unfavoriting recipes"""
     
-    @patch('commands.command_handlers.execute_update')
-    def test_unfavorite_existing(self, mock_update):
+    def test_unfavorite_existing(self, handler_mocks):
         """Test unfavoriting a favorited recipe"""
-        mock_update.return_value = 1
+        handler_mocks.execute_update.return_value = 1
         
         result = handle_unfavorite_recipe('user-123', '1')
         
         assert result['success'] is True
     
-    @patch('commands.command_handlers.execute_update')
-    def test_unfavorite_not_favorited(self, mock_update):
+    def test_unfavorite_not_favorited(self, handler_mocks):
         """Test unfavoriting a recipe that wasn't favorited"""
-        mock_update.return_value = 0
+        handler_mocks.execute_update.return_value = 0
         
         result = handle_unfavorite_recipe('user-123', '1')
         
@@ -142,45 +138,79 @@ class TestUnfavoriteRecipe:
 class TestUpdateAppliances:
     """Test updating user appliances"""
     
-    @patch('commands.command_handlers.execute_update')
-    def test_update_appliances_list(self, mock_update):
+    def test_update_appliances_list(self, handler_mocks):
         """Test updating user's appliances"""
-        mock_update.return_value = 1
+        handler_mocks.execute_update.return_value = 1
         
         appliances = ['pan', 'oven', 'blender']
         result = handle_update_appliances('user-123', appliances)
         
         assert result['success'] is True
     
-    @patch('commands.command_handlers.execute_update')
-    def test_clear_all_appliances(self, mock_update):
+    def test_clear_all_appliances(self, handler_mocks):
         """Test clearing all appliances"""
-        mock_update.return_value = 0
+        handler_mocks.execute_update.return_value = 0
         
         result = handle_update_appliances('user-123', [])
         
         assert result['success'] is True
 
 
+class TestCreateUser:
+    """Test creating users through the command handler"""
+    
+    def test_create_new_user(self, handler_mocks):
+        """Test that a new username is inserted and UserCreated is published"""
+        handler_mocks.execute_update.return_value = 1
+        
+        result = handle_create_user('newuser', 'password123', ['vegan', 'nut-free'])
+        
+        assert result['success'] is True
+        sql, params = handler_mocks.execute_update.call_args.args
+        assert 'ON CONFLICT (username) DO NOTHING' in sql
+        assert params[0] == result['user_id']
+        assert params[1:] == ('newuser', 'password123', 'vegan,nut-free', 'beginner')
+        # one round trip: no SELECT for the username first
+        assert not handler_mocks.execute_query.called
+        
+        event = handler_mocks.event_bus.publish.call_args.args[0]
+        assert event.user_id == result['user_id']
+        assert event.username == 'newuser'
+        assert event.dietary_restrictions == ['vegan', 'nut-free']
+    
+    def test_create_duplicate_username(self, handler_mocks):
+        """Test that a username conflict (no row inserted) fails without publishing"""
+        handler_mocks.execute_update.return_value = 0
+        
+        result = handle_create_user('existinguser', 'password123')
+        
+        assert result == {'success': False, 'message': 'Username already exists'}
+        assert not handler_mocks.event_bus.publish.called
+    
+    def test_create_requires_username_and_password(self, handler_mocks):
+        """Test that missing credentials are rejected before touching the database"""
+        result = handle_create_user('', 'password123')
+        
+        assert result['success'] is False
+        assert not handler_mocks.execute_update.called
+
+
 class TestUserRegistration:
     """Test user registration"""
     
-    @patch('commands.auth_handlers.execute_update')
-    @patch('commands.auth_handlers.execute_query')
-    def test_register_new_user(self, mock_query, mock_update):
+    def test_register_new_user(self, handler_mocks):
         """Test successful user registration"""
-        mock_query.return_value = None  # username not taken
-        mock_update.return_value = 1
+        handler_mocks.execute_query.return_value = None  # username not taken
+        handler_mocks.execute_update.return_value = 1
         
         result = handle_register_user('newuser', 'password123')
         
         assert result['success'] is True
         assert 'user_id' in result
     
-    @patch('commands.auth_handlers.execute_query')
-    def test_register_duplicate_username(self, mock_query):
+    def test_register_duplicate_username(self, handler_mocks):
         """Test registration with existing username"""
-        mock_query.return_value = {'u_id': 'existing'}
+        handler_mocks.execute_query.return_value = {'u_id': 'existing'}
         
         result = handle_register_user('existinguser', 'password123')
         
@@ -203,45 +233,38 @@ class TestUserRegistration:
 class TestUserLogin:
     """Test user login"""
     
-    @patch('commands.auth_handlers.execute_query')
-    @patch('commands.auth_handlers.verify_password')
-    def test_login_success(self, mock_verify, mock_query):
+    def test_login_success(self, handler_mocks, fake_verify):
         """Test successful login"""
-        mock_query.return_value = {
+        handler_mocks.execute_query.return_value = {
             'u_id': 'user-123',
             'username': 'testuser',
             'password': 'hashed_password',
             'skill': 'beginner',
             'diet': None
         }
-        mock_verify.return_value = True
         
         result = handle_login_user('testuser', 'correctpass')
         
         assert result['success'] is True
         assert 'user' in result
     
-    @patch('commands.auth_handlers.execute_query')
-    def test_login_user_not_found(self, mock_query):
+    def test_login_user_not_found(self, handler_mocks):
         """Test login with non-existent user"""
-        mock_query.return_value = None
+        handler_mocks.execute_query.return_value = None
         
         result = handle_login_user('nonexistent', 'password')
         
         assert result['success'] is False
     
-    @patch('commands.auth_handlers.execute_query')
-    @patch('commands.auth_handlers.verify_password')
-    def test_login_wrong_password(self, mock_verify, mock_query):
+    def test_login_wrong_password(self, handler_mocks, fake_verify):
         """Test login with wrong password"""
-        mock_query.return_value = {
+        handler_mocks.execute_query.return_value = {
             'u_id': 'user-123',
             'username': 'testuser',
             'password': 'hashed_password',
             'skill': 'beginner',
             'diet': None
         }
-        mock_verify.return_value = False
         
         result = handle_login_user('testuser', 'wrongpass')
         
@@ -251,25 +274,18 @@ class TestUserLogin:
 class TestPasswordUpdate:
     """Test password update"""
     
-    @patch('commands.auth_handlers.execute_update')
-    @patch('commands.auth_handlers.execute_query')
-    @patch('commands.auth_handlers.verify_password')
-    def test_update_password_success(self, mock_verify, mock_query, mock_update):
+    def test_update_password_success(self, handler_mocks, fake_verify):
         """Test successful password update"""
-        mock_query.return_value = {'password': 'old_hash'}
-        mock_verify.return_value = True
-        mock_update.return_value = 1
+        handler_mocks.execute_query.return_value = {'password': 'old_hash'}
+        handler_mocks.execute_update.return_value = 1
         
         result = handle_update_user_password('user-123', 'oldpass', 'newpass123')
         
         assert result['success'] is True
     
-    @patch('commands.auth_handlers.execute_query')
-    @patch('commands.auth_handlers.verify_password')
-    def test_update_password_wrong_old(self, mock_verify, mock_query):
+    def test_update_password_wrong_old(self, handler_mocks, fake_verify):
         """Test password update with wrong old password"""
-        mock_query.return_value = {'password': 'old_hash'}
-        mock_verify.return_value = False
+        handler_mocks.execute_query.return_value = {'password': 'old_hash'}
         
         result = handle_update_user_password('user-123', 'wrongold', 'newpass123')
         
@@ -285,34 +301,24 @@ class TestPasswordUpdate:
 class TestEventPublishing:
     """Test that commands publish events"""
     
-    @patch('commands.command_handlers.get_event_bus')
-    @patch('commands.command_handlers.execute_update')
-    @patch('commands.command_handlers.execute_query')
-    def test_add_ingredient_publishes_event(self, mock_query, mock_update, mock_bus):
+    def test_add_ingredient_publishes_event(self, handler_mocks):
         """Test that adding ingredient publishes event"""
-        mock_query.side_effect = [
-            {'u_id': 'user-123'},
-            {'i_id': 1}
-        ]
-        mock_update.return_value = 1
-        mock_event_bus = MagicMock()
-        mock_bus.return_value = mock_event_bus
+        handler_mocks.execute_query.side_effect = answer_queries({
+            'FROM "user"': USER_ROW,
+            'FROM ingredients': INGREDIENT_ROW
+        })
+        handler_mocks.execute_update.return_value = 1
         
         handle_add_ingredient('user-123', 'chicken', 1.0)
         
         # Event should be published
-        assert mock_event_bus.publish.called
+        assert handler_mocks.event_bus.publish.called
     
-    @patch('commands.auth_handlers.get_event_bus')
-    @patch('commands.auth_handlers.execute_update')
-    @patch('commands.auth_handlers.execute_query')
-    def test_registration_publishes_event(self, mock_query, mock_update, mock_bus):
+    def test_registration_publishes_event(self, handler_mocks):
         """Test that registration publishes event"""
-        mock_query.return_value = None
-        mock_update.return_value = 1
-        mock_event_bus = MagicMock()
-        mock_bus.return_value = mock_event_bus
+        handler_mocks.execute_query.return_value = None
+        handler_mocks.execute_update.return_value = 1
         
         handle_register_user('newuser', 'password123')
         
-        assert mock_event_bus.publish.called
\ No newline at end of file
+        assert handler_mocks.event_bus.publish.called
\ No newline at end of file
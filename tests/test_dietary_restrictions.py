@@ -11,71 +11,41 @@ from queries.dietary_restrictions import (
 )
 
 
+@pytest.fixture(scope="module")
+def vegan_recipe():
+    """Recipe with dairy and eggs (shared, read-only)"""
+    return ('pasta', 'cheese', 'eggs', 'butter')
+
+
+@pytest.fixture(scope="module")
+def vegetarian_recipe():
+    """Recipe with meat (shared, read-only)"""
+    return ('chicken', 'rice', 'soy sauce')
+
+
 class TestCheckRecipeCompatibility:
     """Test recipe compatibility checking"""
     
-    def test_vegetarian_blocks_meat(self):
+    def test_vegetarian_blocks_meat(self, vegetarian_recipe):
         """Test that vegetarian filter blocks meat"""
-        recipe_ingredients = ['chicken', 'rice', 'soy sauce']
-        restrictions = ['vegetarian']
-        
         is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
+            vegetarian_recipe, ['vegetarian']
         )
         
         assert is_compatible is False
         assert len(violations) > 0
         assert any(v['ingredient'] == 'chicken' for v in violations)
     
-    def test_vegan_blocks_dairy_and_eggs(self):
+    def test_vegan_blocks_dairy_and_eggs(self, vegan_recipe):
         """Test that vegan filter blocks dairy and eggs"""
-        recipe_ingredients = ['pasta', 'cheese', 'eggs', 'butter']
-        restrictions = ['vegan']
-        
         is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
+            vegan_recipe, ['vegan']
         )
         
         assert is_compatible is False
         # Should catch cheese, eggs, AND butter
         assert len(violations) >= 3
     
-    def test_gluten_free_blocks_wheat(self):
-        """Test that gluten-free filter blocks wheat products"""
-        recipe_ingredients = ['chicken', 'pasta', 'tomato']
-        restrictions = ['gluten-free']
-        
-        is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
-        )
-        
-        assert is_compatible is False
-        assert any(v['ingredient'] == 'pasta' for v in violations)
-    
-    def test_dairy_free_blocks_milk_products(self):
-        """Test that dairy-free filter blocks all dairy"""
-        recipe_ingredients = ['oats', 'milk', 'banana']
-        restrictions = ['dairy-free']
-        
-        is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
-        )
-        
-        assert is_compatible is False
-        assert any(v['ingredient'] == 'milk' for v in violations)
-    
-    def test_nut_free_blocks_nuts(self):
-        """Test that nut-free filter blocks nuts"""
-        recipe_ingredients = ['oats', 'peanut butter', 'banana']
-        restrictions = ['nut-free']
-        
-        is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
-        )
-        
-        assert is_compatible is False
-        assert any('peanut' in v['ingredient'] for v in violations)
-    
     def test_multiple_restrictions(self):
         """Test checking multiple restrictions at once"""
         recipe_ingredients = ['chicken', 'bread', 'cheese']
@@ -88,66 +58,39 @@ class TestCheckRecipeCompatibility:
         assert is_compatible is False
         # Should violate both vegetarian (chicken) and gluten-free (bread)
         assert len(violations) >= 2
+
+
+# (recipe ingredients, restrictions, expected compatible, substring of a blocked ingredient)
+CASES = [
+    # gluten-free blocks wheat products
+    (['chicken', 'pasta', 'tomato'], ['gluten-free'], False, 'pasta'),
+    # dairy-free blocks all dairy
+    (['oats', 'milk', 'banana'], ['dairy-free'], False, 'milk'),
+    # nut-free blocks nuts
+    (['oats', 'peanut butter', 'banana'], ['nut-free'], False, 'peanut'),
+    # partial matches are caught: 'cheddar cheese' contains 'cheese'
+    (['pasta', 'cheddar cheese', 'tomato'], ['vegan'], False, 'cheese'),
+    # matching is case-insensitive
+    (['CHICKEN', 'Rice'], ['vegetarian'], False, 'chicken'),
+    # vegetarian-friendly recipe passes
+    (['tofu', 'rice', 'broccoli', 'soy sauce'], ['vegetarian'], True, None),
+    # vegan-friendly recipe passes
+    (['chickpeas', 'rice', 'tomato', 'onion'], ['vegan'], True, None),
+    # no dietary restrictions
+    (['chicken', 'bread', 'cheese', 'eggs'], [], True, None),
+]
+
+
+@pytest.mark.parametrize("recipe_ingredients, restrictions, expect_compat, expect_sub", CASES)
+def test_compatibility(recipe_ingredients, restrictions, expect_compat, expect_sub):
+    """Test compatibility verdicts and the ingredient each violation names"""
+    is_compatible, violations = check_recipe_compatibility(recipe_ingredients, restrictions)
     
-    def test_compatible_recipe_vegetarian(self):
-        """Test that vegetarian-friendly recipe passes"""
-        recipe_ingredients = ['tofu', 'rice', 'broccoli', 'soy sauce']
-        restrictions = ['vegetarian']
-        
-        is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
-        )
-        
-        assert is_compatible is True
-        assert len(violations) == 0
-    
-    def test_compatible_recipe_vegan(self):
-        """Test that vegan-friendly recipe passes"""
-        recipe_ingredients = ['chickpeas', 'rice', 'tomato', 'onion']
-        restrictions = ['vegan']
-        
-        is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
-        )
-        
-        assert is_compatible is True
+    assert is_compatible is expect_compat
+    if expect_compat:
         assert len(violations) == 0
-    
-    def test_no_restrictions(self):
-        """Test with no dietary restrictions"""
-        recipe_ingredients = ['chicken', 'bread', 'cheese', 'eggs']
-        restrictions = []
-        
-        is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
-        )
-        
-        assert is_compatible is True
-        assert len(violations) == 0
-    
-    def test_case_insensitive_matching(self):
-        """Test that matching is case-insensitive"""
-        recipe_ingredients = ['CHICKEN', 'Rice']
-        restrictions = ['vegetarian']
-        
-        is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
-        )
-        
-        assert is_compatible is False
-    
-    def test_partial_ingredient_matching(self):
-        """Test that partial matches are caught (e.g., 'cheddar cheese')"""
-        recipe_ingredients = ['pasta', 'cheddar cheese', 'tomato']
-        restrictions = ['vegan']
-        
-        is_compatible, violations = check_recipe_compatibility(
-            recipe_ingredients, restrictions
-        )
-        
-        assert is_compatible is False
-        # Should catch that 'cheddar cheese' contains 'cheese'
-        assert any('cheese' in v['ingredient'] for v in violations)
+    else:
+        assert any(expect_sub in v['ingredient'] for v in violations)
 
 
 class TestGetRestrictionInfo:
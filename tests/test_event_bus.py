@@ -0,0 +1,166 @@
+"""
+Tests for the Event Bus
+Tests synchronous and async batched delivery
+"""
+import queue
+import threading
+import pytest
+
+from events.event_bus import EventBus
+from events.event_types import EventType
+from events.domain_events import IngredientRemovedEvent, RecipeUnfavoritedEvent
+
+
+def removed(n):
+    return IngredientRemovedEvent(user_id='user-123', ingredient_id=str(n))
+
+
+@pytest.fixture
+def async_bus():
+    """An async bus with small batches, closed after the test"""
+    bus = EventBus(async_mode=True, batch_size=8)
+    yield bus
+    bus.close(timeout=5)
+
+
+class TestSyncDelivery:
+    """Test the default synchronous bus"""
+    
+    def test_publish_delivers_before_returning(self):
+        """Test that subscribers have run when publish returns"""
+        bus = EventBus()
+        received = []
+        bus.subscribe(EventType.INGREDIENT_REMOVED, received.append, typed=True)
+        
+        bus.publish(removed(1))
+        
+        assert [e.ingredient_id for e in received] == ['1']
+        assert bus.flush() is True
+
+
+class TestAsyncDelivery:
+    """Test async batched delivery"""
+    
+    def test_per_event_subscribers_keep_publish_order(self, async_bus):
+        """Test that typed and dict subscribers see every event in order"""
+        typed, dicts = [], []
+        async_bus.subscribe(EventType.INGREDIENT_REMOVED, typed.append, typed=True)
+        async_bus.subscribe(EventType.INGREDIENT_REMOVED, dicts.append)
+        
+        for n in range(100):
+            async_bus.publish(removed(n))
+        assert async_bus.flush(timeout=5)
+        
+        expected = [str(n) for n in range(100)]
+        assert [e.ingredient_id for e in typed] == expected
+        assert [d['data']['ingredient_id'] for d in dicts] == expected
+    
+    def test_batch_subscribers_get_bounded_batches_per_type(self, async_bus):
+        """Test that batches respect batch_size and only hold one event type"""
+        batches = []
+        async_bus.subscribe_batch(EventType.INGREDIENT_REMOVED, batches.append)
+        
+        for n in range(50):
+            async_bus.publish(removed(n))
+            async_bus.publish(RecipeUnfavoritedEvent(user_id='user-123', recipe_id=str(n)))
+        assert async_bus.flush(timeout=5)
+        
+        assert all(0 < len(batch) <= 8 for batch in batches)
+        assert sum(len(batch) for batch in batches) == 50
+    
+    def test_publish_does_not_wait_for_subscribers(self, async_bus):
+        """Test that publish returns while a subscriber is still busy"""
+        release = threading.Event()
+        async_bus.subscribe(EventType.INGREDIENT_REMOVED, lambda event: release.wait(5), typed=True)
+        
+        async_bus.publish(removed(1))
+        
+        assert not async_bus.flush(timeout=0.05)
+        release.set()
+        assert async_bus.flush(timeout=5)
+    
+    def test_failing_subscriber_does_not_drop_the_batch(self, async_bus):
+        """Test that one subscriber raising doesn't stop delivery to the others"""
+        received, batches = [], []
+        
+        def flaky(event):
+            if event.ingredient_id == '3':
+                raise ValueError('boom')
+        
+        async_bus.subscribe(EventType.INGREDIENT_REMOVED, flaky, typed=True)
+        async_bus.subscribe(EventType.INGREDIENT_REMOVED, received.append, typed=True)
+        async_bus.subscribe_batch(EventType.INGREDIENT_REMOVED, batches.append)
+        
+        for n in range(8):
+            async_bus.publish(removed(n))
+        assert async_bus.flush(timeout=5)
+        
+        assert [e.ingredient_id for e in received] == [str(n) for n in range(8)]
+        assert sum(len(batch) for batch in batches) == 8
+    
+    def test_close_delivers_queued_events(self):
+        """Test that closing the bus delivers what was queued, then publishes synchronously"""
+        bus = EventBus(async_mode=True, batch_size=8)
+        received = []
+        bus.subscribe(EventType.INGREDIENT_REMOVED, received.append, typed=True)
+        
+        for n in range(20):
+            bus.publish(removed(n))
+        bus.close(timeout=5)
+        assert len(received) == 20
+        
+        bus.publish(removed(20))
+        assert len(received) == 21
+    
+    def test_publish_racing_close_is_not_lost(self, monkeypatch):
+        """Test that an event published while close() is stopping the dispatcher is still delivered"""
+        racers = []
+        
+        class RacingQueue(queue.SimpleQueue):
+            # another thread publishes right after close() enqueues its stop marker
+            def put(self, item, block=True, timeout=None):
+                super().put(item)
+                if item is None:
+                    racer = threading.Thread(target=bus.publish, args=(removed(2),))
+                    racer.start()
+                    racer.join(0.1)
+                    racers.append(racer)
+        
+        monkeypatch.setattr(queue, 'SimpleQueue', RacingQueue)
+        bus = EventBus(async_mode=True, batch_size=8)
+        received = []
+        bus.subscribe(EventType.INGREDIENT_REMOVED, lambda event: received.append(event.ingredient_id), typed=True)
+        bus.publish(removed(1))
+        
+        bus.close(timeout=5)
+        racers[0].join(5)
+        
+        assert received == ['1', '2']
+    
+    def test_publish_after_timed_out_close_waits_for_dispatcher(self):
+        """Test that a close that times out doesn't leave two threads delivering"""
+        bus = EventBus(async_mode=True, batch_size=8)
+        release = threading.Event()
+        received = []
+        in_flight = []
+        
+        def slow(event):
+            in_flight.append(event)
+            assert len(in_flight) == 1, 'two threads delivering at once'
+            release.wait(5)
+            received.append(event.ingredient_id)
+            in_flight.remove(event)
+        
+        bus.subscribe(EventType.INGREDIENT_REMOVED, slow, typed=True)
+        bus.publish(removed(1))
+        bus.close(timeout=0.05)
+        
+        publisher = threading.Thread(target=bus.publish, args=(removed(2),))
+        publisher.start()
+        publisher.join(0.05)
+        assert publisher.is_alive()
+        
+        release.set()
+        publisher.join(5)
+        assert received == ['1', '2']
+        assert bus.flush(timeout=5)
@@ -0,0 +1,140 @@
+"""
+Tests for Event Consumers
+Tests the event-maintained recipe match projection with mocked PostgreSQL
+"""
+import pytest
+from unittest.mock import patch
+
+from events.event_bus import EventBus
+from events.domain_events import IngredientAddedEvent, IngredientRemovedEvent
+from consumers import event_consumers
+from consumers.event_consumers import setup_event_consumers, get_user_recipe_matches
+
+# recipe 1 uses ingredients 10 and 11; recipe 2 uses 11, 12 and 13
+USES_INGREDIENT = {
+    10: [{'r_id': 1, 'total': 2}],
+    11: [{'r_id': 1, 'total': 2}, {'r_id': 2, 'total': 3}],
+    12: [{'r_id': 2, 'total': 3}],
+    13: [{'r_id': 2, 'total': 3}],
+}
+
+
+@pytest.fixture
+def pantry_db():
+    """A fake database where the user already has ingredient 11 in their pantry"""
+    pantry = {'user-123': [11]}
+    
+    def execute_query(query, params=None, fetch_all=False):
+        if 'has_ingredient' in query:
+            return [{'i_id': i_id} for i_id in pantry.get(params[0], [])]
+        return USES_INGREDIENT.get(params[0], [])
+    
+    with patch('consumers.event_consumers.execute_query', side_effect=execute_query) as mock_execute:
+        yield pantry, mock_execute
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    """A fresh event bus with the consumers subscribed and an empty projection"""
+    event_bus = EventBus()
+    monkeypatch.setattr(event_consumers, 'get_event_bus', lambda: event_bus)
+    monkeypatch.setitem(event_consumers._analytics_db, 'user_recipe_matches', {})
+    monkeypatch.setattr(event_consumers, '_recipes_by_ingredient', {})
+    monkeypatch.setattr(event_consumers, '_recipe_sizes', {})
+    setup_event_consumers()
+    return event_bus
+
+
+def add(bus, pantry, ingredient_id):
+    # the command writes the row before the event is published
+    pantry['user-123'].append(ingredient_id)
+    bus.publish(IngredientAddedEvent(
+        user_id='user-123', ingredient_id=str(ingredient_id), ingredient_name='x', amount=1.0
+    ))
+
+
+def remove(bus, pantry, ingredient_id):
+    pantry['user-123'].remove(ingredient_id)
+    bus.publish(IngredientRemovedEvent(user_id='user-123', ingredient_id=str(ingredient_id)))
+
+
+def counts(user_id='user-123'):
+    return {m['id']: m['matched_count'] for m in get_user_recipe_matches(user_id)}
+
+
+class TestRecipeMatchProjection:
+    """Test the per-user recipe match projection"""
+    
+    def test_cold_user_has_no_projection(self, bus, pantry_db):
+        """Test that a user with no pantry events isn't served from the projection"""
+        assert get_user_recipe_matches('user-123') is None
+    
+    def test_first_add_seeds_existing_pantry(self, bus, pantry_db):
+        """Test that ingredients already in the pantry count toward matches"""
+        pantry, _ = pantry_db
+        
+        add(bus, pantry, 10)
+        
+        assert counts() == {1: 2, 2: 1}
+        assert get_user_recipe_matches('user-123')[0]['match_percentage'] == 100.0
+    
+    def test_add_remove_re_add(self, bus, pantry_db):
+        """Test that counts track add, remove and re-add against a seeded pantry"""
+        pantry, _ = pantry_db
+        
+        add(bus, pantry, 12)
+        assert counts() == {1: 1, 2: 2}
+        
+        remove(bus, pantry, 11)
+        assert counts() == {2: 1}
+        
+        add(bus, pantry, 11)
+        assert counts() == {1: 1, 2: 2}
+    
+    def test_re_adding_held_ingredient_is_not_counted_twice(self, bus, pantry_db):
+        """Test that updating an ingredient already in the pantry leaves counts alone"""
+        pantry, _ = pantry_db
+        
+        add(bus, pantry, 12)
+        bus.publish(IngredientAddedEvent(
+            user_id='user-123', ingredient_id='12', ingredient_name='x', amount=2.0
+        ))
+        
+        assert counts() == {1: 1, 2: 2}
+    
+    def test_remove_for_cold_user_is_ignored(self, bus, pantry_db):
+        """Test that a removal before any add doesn't create a projection"""
+        pantry, _ = pantry_db
+        
+        remove(bus, pantry, 11)
+        
+        assert get_user_recipe_matches('user-123') is None
+    
+    def test_recipe_lookups_are_cached(self, bus, pantry_db):
+        """Test that each ingredient's recipes are fetched from the database once"""
+        pantry, mock_execute = pantry_db
+        
+        add(bus, pantry, 12)
+        remove(bus, pantry, 12)
+        add(bus, pantry, 12)
+        
+        recipe_lookups = [c for c in mock_execute.call_args_list if 'uses_ingredient' in c.args[0]]
+        assert sorted(c.args[1][0] for c in recipe_lookups) == [11, 12]
+    
+    def test_database_is_read_outside_the_write_lock(self, bus, pantry_db):
+        """Test that seeding and recipe lookups don't hold the analytics write lock"""
+        pantry, mock_execute = pantry_db
+        lock_held = []
+        side_effect = mock_execute.side_effect
+        
+        def execute_query(*args, **kwargs):
+            lock_held.append(event_consumers._write_lock.locked())
+            return side_effect(*args, **kwargs)
+        mock_execute.side_effect = execute_query
+        
+        add(bus, pantry, 10)
+        add(bus, pantry, 12)
+        remove(bus, pantry, 10)
+        
+        assert lock_held and not any(lock_held)
+        assert counts() == {1: 1, 2: 2}
@@ -0,0 +1,70 @@
+"""
+Unit Tests for pooled UUID4 generation
+Tests the id format, uniqueness across pool refills and fork safety
+"""
+import os
+import uuid
+import pytest
+from unittest.mock import patch
+
+from utils import fast_uuid
+from utils.fast_uuid import new_uuid4_str
+
+IDS_PER_POOL = fast_uuid._POOL_SIZE // 16
+
+
+class TestNewUuid4Str:
+    """Test generating ids from the byte pool"""
+    
+    def test_returns_version_4_uuid_string(self):
+        """Test that each id parses as a canonical RFC 4122 version 4 UUID"""
+        for _ in range(100):
+            value = new_uuid4_str()
+            parsed = uuid.UUID(value)
+            
+            assert str(parsed) == value
+            assert parsed.version == 4
+            assert parsed.variant == uuid.RFC_4122
+    
+    def test_unique_across_pool_refills(self):
+        """Test that ids stay unique while the pool is refilled several times"""
+        fast_uuid._reset_pool()
+        with patch('utils.fast_uuid.os.urandom', wraps=os.urandom) as mock_urandom:
+            values = [new_uuid4_str() for _ in range(3 * IDS_PER_POOL + 1)]
+        
+        assert len(set(values)) == len(values)
+        # one bulk read per pool, not one per id
+        assert mock_urandom.call_count == 4
+    
+    def test_reset_pool_forces_refill(self):
+        """Test that after a reset the next id comes from fresh random bytes"""
+        new_uuid4_str()
+        fast_uuid._reset_pool()
+        
+        with patch('utils.fast_uuid.os.urandom', wraps=os.urandom) as mock_urandom:
+            new_uuid4_str()
+        
+        mock_urandom.assert_called_once_with(fast_uuid._POOL_SIZE)
+    
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+    def test_forked_child_does_not_reuse_parent_bytes(self):
+        """Test that a forked child draws its own bytes instead of the parent's pool"""
+        # leave most of a pool in the parent, so a stale child copy would repeat it
+        fast_uuid._reset_pool()
+        new_uuid4_str()
+        
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # child: report its next id and exit without running pytest teardown
+            os.close(read_fd)
+            os.write(write_fd, new_uuid4_str().encode())
+            os._exit(0)
+        
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            child_value = pipe.read()
+        os.waitpid(pid, 0)
+        
+        assert uuid.UUID(child_value).version == 4
+        assert child_value != new_uuid4_str()
@@ -0,0 +1,252 @@
+"""
+Unit Tests for the legacy CLI ingredient parser
+Tests fuzzy matching and ingredient list parsing
+"""
+import math
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip('rapidfuzz')
+
+# "old main" is put on the import path by the root conftest.py
+import ingredient_parser
+from ingredient_parser import (
+    build_master_ingredient_list,
+    fuzzy_match_ingredient,
+    match_ingredients,
+    parse_ingredients,
+    _length_window,
+    _parse_confirmations
+)
+from rapidfuzz import process, utils
+from rapidfuzz.distance import JaroWinkler
+
+
+@pytest.fixture(scope='module')
+def master():
+    """Master ingredient list built from a couple of recipes"""
+    return build_master_ingredient_list([
+        {'ingredients': ['Tomato', 'garlic', 'chicken breast', 'olive oil']},
+        {'ingredients': ['onion', 'basil', 'butter', 'garlic ']}
+    ])
+
+
+class TestBuildMasterIngredientList:
+    """Test building the fuzzy matching dictionary"""
+    
+    def test_normalizes_and_dedupes(self, master):
+        """Test that ingredients are lowercased, stripped and unique"""
+        assert master == frozenset([
+            'tomato', 'garlic', 'chicken breast', 'olive oil', 'onion', 'basil', 'butter'
+        ])
+
+
+class TestFuzzyMatchIngredient:
+    """Test matching one ingredient against the master list"""
+    
+    def test_exact_match(self, master):
+        """Test that an exact (case-insensitive) match scores 100 without confirmation"""
+        result = fuzzy_match_ingredient('Tomato', master)
+        
+        assert result == {'match': 'tomato', 'score': 100, 'original': 'Tomato', 'needs_confirmation': False}
+    
+    def test_typo_needs_confirmation(self, master):
+        """Test that a close match below 98 asks the user"""
+        result = fuzzy_match_ingredient('tomatoe', master)
+        
+        assert result['match'] == 'tomato'
+        assert 88 <= result['score'] < 98
+        assert result['needs_confirmation'] is True
+    
+    def test_confident_match_skips_confirmation(self, master):
+        """Test that a 98+ match is used without asking"""
+        result = fuzzy_match_ingredient('chiken breast', master)
+        
+        assert result['match'] == 'chicken breast'
+        assert result['score'] >= 98
+        assert result['needs_confirmation'] is False
+    
+    def test_unmatched_scores_zero(self, master):
+        """Test that input with no close match reports no match and score 0"""
+        result = fuzzy_match_ingredient('xyzzy', master)
+        
+        assert result == {'match': None, 'score': 0, 'original': 'xyzzy', 'needs_confirmation': False}
+    
+    def test_results_are_copies(self, master):
+        """Test that editing a result doesn't change later lookups"""
+        fuzzy_match_ingredient('garlick', master)['match'] = 'changed'
+        
+        assert fuzzy_match_ingredient('garlick', master)['match'] == 'garlic'
+    
+    def test_case_variants_keep_their_original(self, master):
+        """Test that cached case variants still report the caller's spelling"""
+        assert fuzzy_match_ingredient('garlick', master)['original'] == 'garlick'
+        assert fuzzy_match_ingredient('GARLICK', master)['original'] == 'GARLICK'
+    
+    def test_cache_is_bounded(self, master):
+        """Test that the match cache never grows past its size"""
+        with patch.object(ingredient_parser, 'MATCH_CACHE_SIZE', 3):
+            for word in ['tomatoe', 'garlick', 'basi', 'butte', 'onoin']:
+                fuzzy_match_ingredient(word, master)
+            
+            assert len(ingredient_parser._match_cache) <= 3
+            assert fuzzy_match_ingredient('onoin', master)['match'] == 'onion'
+    
+    @pytest.mark.parametrize('word', ['tomatoe', 'garlick', 'basi', 'butte', 'olive oyl', 'onoin', 'chikn'])
+    def test_length_window_keeps_the_best_match(self, master, word):
+        """Test that skipping candidates by length gives the same match as scoring them all"""
+        choices = sorted(master)
+        best = process.extractOne(
+            word, choices, scorer=JaroWinkler.normalized_similarity,
+            processor=utils.default_process, score_cutoff=0.88
+        )
+        
+        result = fuzzy_match_ingredient(word, master)
+        
+        if best is None:
+            assert result['match'] is None
+        else:
+            assert result['match'] == best[0]
+            assert result['score'] == round(best[1] * 100)
+
+
+class TestLengthWindow:
+    """Test the candidate length bounds for a threshold"""
+    
+    def test_low_threshold_has_no_bound(self):
+        """Test that thresholds of 80 or less can't rule out any length"""
+        assert _length_window(6, 80) == (0, math.inf)
+        assert _length_window(6, 50) == (0, math.inf)
+    
+    def test_bounds_at_default_threshold(self):
+        """Test the bounds at the default threshold of 88"""
+        assert _length_window(10, 88) == (4, 25)
+    
+    def test_exact_threshold_allows_only_same_length(self):
+        """Test that a threshold of 100 only admits equal lengths"""
+        assert _length_window(7, 100) == (7, 7)
+
+
+class TestMatchIngredients:
+    """Test matching a whole ingredient list"""
+    
+    def test_results_follow_input_order(self, master):
+        """Test that there is one result per input, in order, repeats included"""
+        results = match_ingredients(['basil', 'tomatoe', 'basil'], master)
+        
+        assert [r['original'] for r in results] == ['basil', 'tomatoe', 'basil']
+        assert results[0] == results[2]
+
+
+class TestParseIngredients:
+    """Test parsing user input into an ingredient list"""
+    
+    def test_without_master_list(self):
+        """Test that input is split on commas and newlines, then normalized"""
+        cleaned, report = parse_ingredients(' Tomato,,garlic\nBasil ,\n')
+        
+        assert cleaned == ['tomato', 'garlic', 'basil']
+        assert report == {}
+    
+    def test_non_interactive(self, master, capsys):
+        """Test that non-interactive parsing keeps confident matches and drops the rest"""
+        cleaned, report = parse_ingredients('garlic, chiken breast, tomatoe, xyzzy', master, interactive=False)
+        
+        assert cleaned == ['garlic', 'chicken breast', 'tomato']
+        assert report['exact_matches'] == ['garlic']
+        assert [m['matched'] for m in report['fuzzy_matches']] == ['chicken breast', 'tomato']
+        assert report['unmatched'] == ['xyzzy']
+        assert report['user_confirmations'] == []
+        assert 'Validating ingredients' in capsys.readouterr().out
+    
+    def test_interactive_prompts_once(self, master, capsys):
+        """Test that all questions are asked in one prompt and the list keeps input order"""
+        with patch('builtins.input', return_value='1') as mock_input:
+            cleaned, report = parse_ingredients('tomatoe, garlic, xyzzy', master)
+        
+        mock_input.assert_called_once()
+        assert cleaned == ['tomato', 'garlic']
+        assert report['user_confirmations'] == ['tomatoe']
+        assert report['unmatched'] == ['xyzzy']
+    
+    def test_interactive_accept_all(self, master, capsys):
+        """Test that 'all' accepts every suggestion and keeps unrecognized input"""
+        with patch('builtins.input', return_value='all'):
+            cleaned, report = parse_ingredients('xyzzy, tomatoe', master)
+        
+        assert cleaned == ['xyzzy', 'tomato']
+        assert report['user_confirmations'] == ['tomatoe']
+    
+    def test_interactive_answer_no(self, master, capsys):
+        """Test that answering 'no' declines everything without asking again"""
+        with patch('builtins.input', return_value='no') as mock_input:
+            cleaned, report = parse_ingredients('tomatoe, basil', master)
+        
+        mock_input.assert_called_once()
+        assert cleaned == ['basil']
+        assert "Skipping 'tomatoe'" in capsys.readouterr().out
+    
+    def test_interactive_reject_all(self, master, capsys):
+        """Test that an empty answer rejects every suggestion"""
+        with patch('builtins.input', return_value=''):
+            cleaned, report = parse_ingredients('tomatoe, basil', master)
+        
+        assert cleaned == ['basil']
+        assert report['unmatched'] == ['tomatoe']
+    
+    def test_no_prompt_without_questions(self, master, capsys):
+        """Test that exact and confident matches never prompt"""
+        with patch('builtins.input') as mock_input:
+            cleaned, _ = parse_ingredients('garlic, chiken breast', master)
+        
+        assert not mock_input.called
+        assert cleaned == ['garlic', 'chicken breast']
+    
+    def test_interactive_echoes_decisions(self, master, capsys):
+        """Test that accepted and rejected suggestions are echoed back"""
+        with patch('builtins.input', return_value='2'):
+            parse_ingredients('tomatoe, xyzzy, garlick', master)
+        
+        out = capsys.readouterr().out
+        assert "Skipping 'tomatoe'" in out
+        assert "Keeping 'xyzzy'" in out
+        assert "Skipping 'garlick'" in out
+    
+    def test_interactive_reasks_on_invalid_answer(self, master, capsys):
+        """Test that an out-of-range or non-numeric answer is reported and asked again"""
+        with patch('builtins.input', side_effect=['1, 5', 'yes please', '1']) as mock_input:
+            cleaned, _ = parse_ingredients('tomatoe, basi', master)
+        
+        out = capsys.readouterr().out
+        assert mock_input.call_count == 3
+        assert 'Not a number from 1 to 2: 5' in out
+        assert 'Not a number from 1 to 2: yes, please' in out
+        assert "Using 'tomato' for 'tomatoe'" in out
+        assert cleaned == ['tomato']
+
+
+class TestParseConfirmations:
+    """Test reading the answer to the confirmation prompt"""
+    
+    @pytest.mark.parametrize('answer', ['all', 'ALL', ' y ', 'yes'])
+    def test_accept_all(self, answer):
+        """Test the answers that accept every question"""
+        assert _parse_confirmations(answer, 3) == ({1, 2, 3}, [])
+    
+    def test_empty_accepts_none(self):
+        """Test that pressing Enter accepts nothing"""
+        assert _parse_confirmations('', 3) == (set(), [])
+    
+    @pytest.mark.parametrize('answer', ['n', 'No', ' none '])
+    def test_decline_all(self, answer):
+        """Test the answers that explicitly decline every question"""
+        assert _parse_confirmations(answer, 3) == (set(), [])
+    
+    @pytest.mark.parametrize('answer', ['1,3', '1 3', ' 3, 1 ', '1,,3', '3 1 3'])
+    def test_numbers(self, answer):
+        """Test commas and spaces both separate numbers, repeats are fine"""
+        assert _parse_confirmations(answer, 3) == ({1, 3}, [])
+    
+    def test_invalid_parts_are_reported(self):
+        """Test that out-of-range and non-numeric parts are returned as invalid"""
+        assert _parse_confirmations('0, 2, 4, x, -1', 3) == ({2}, ['0', '4', 'x', '-1'])
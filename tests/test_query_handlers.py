@@ -4,19 +4,17 @@ Tests database query operations with mocked PostgreSQL
 """
 import pytest
 from unittest.mock import patch, MagicMock
-import sys
-import os
-
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from queries.query_handlers import (
         query_user_profile,
         query_user_pantry,
+        query_user_pantry_names,
         query_recipe_by_id,
         query_recipes_by_ingredients,
         query_user_favorites,
-        query_shopping_suggestions
+        query_shopping_suggestions,
+        query_top_recipe_matches
     )
     QUERIES_AVAILABLE = True
 except ImportError:
@@ -92,6 +90,15 @@ class TestQueryUserPantry:
         result = query_user_pantry('user-123')
         assert len(result) == 0
 
+    @patch('queries.query_handlers.execute_query')
+    def test_query_pantry_names(self, mock_execute):
+        """Test querying just the lowercased ingredient names"""
+        mock_execute.return_value = [{'name': 'Chicken'}, {'name': 'rice'}]
+
+        result = query_user_pantry_names('user-123')
+
+        assert result == frozenset({'chicken', 'rice'})
+
 
 class TestQueryRecipeById:
     """Test single recipe retrieval"""
@@ -132,8 +139,8 @@ class TestQueryRecipesByIngredients:
         # Mock recipe list
         mock_execute.side_effect = [
             [{'id': 1, 'name': 'Chicken Rice', 'desc': 'Asian', 'time': 30, 'skill': 'beginner', 'serving': 2}],
-            [{'name': 'chicken'}, {'name': 'rice'}],  # recipe ingredients
-            [{'name': 'pan'}]  # equipment
+            [{'r_id': 1, 'name': 'chicken'}, {'r_id': 1, 'name': 'rice'}],  # recipe ingredients
+            [{'r_id': 1, 'name': 'pan'}]  # equipment
         ]
         
         result = query_recipes_by_ingredients(['chicken', 'rice'], {}, user_id=None)
@@ -146,12 +153,37 @@ class TestQueryRecipesByIngredients:
         
         assert len(recipes) > 0
         assert recipes[0]['match_percentage'] == 100.0
+        assert recipes[0]['equipment'] == ['pan']
+    
+    @patch('queries.query_handlers.execute_query')
+    def test_search_fetches_details_in_bulk(self, mock_execute):
+        """Test that ingredients and equipment are fetched once for all recipes"""
+        mock_execute.side_effect = [
+            [
+                {'id': 1, 'name': 'Chicken Rice', 'desc': '', 'time': 30, 'skill': 'beginner', 'serving': 2},
+                {'id': 2, 'name': 'Fried Rice', 'desc': '', 'time': 20, 'skill': 'beginner', 'serving': 2}
+            ],
+            [
+                {'r_id': 1, 'name': 'chicken'}, {'r_id': 1, 'name': 'rice'},
+                {'r_id': 2, 'name': 'rice'}, {'r_id': 2, 'name': 'egg'}
+            ],
+            []
+        ]
+        
+        result = query_recipes_by_ingredients(['chicken', 'rice'], {}, user_id=None)
+        
+        assert mock_execute.call_count == 3
+        by_id = {r['id']: r for r in result['compatible']}
+        assert by_id[1]['match_percentage'] == 100.0
+        assert by_id[2]['missing_ingredients'] == ['egg']
     
     @patch('queries.query_handlers.execute_query')
     def test_search_with_time_filter(self, mock_execute):
         """Test search with time constraint"""
-        mock_execute.return_value = [
-            {'id': 1, 'name': 'Quick Recipe', 'desc': '', 'time': 15, 'skill': 'beginner', 'serving': 2}
+        mock_execute.side_effect = [
+            [{'id': 1, 'name': 'Quick Recipe', 'desc': '', 'time': 15, 'skill': 'beginner', 'serving': 2}],
+            [{'r_id': 1, 'name': 'chicken'}],  # recipe ingredients
+            []  # equipment
         ]
         
         filters = {'max_time': 20}
@@ -163,8 +195,10 @@ class TestQueryRecipesByIngredients:
     @patch('queries.query_handlers.execute_query')
     def test_search_with_skill_filter(self, mock_execute):
         """Test search with skill level filter"""
-        mock_execute.return_value = [
-            {'id': 1, 'name': 'Easy Recipe', 'desc': '', 'time': 30, 'skill': 'beginner', 'serving': 2}
+        mock_execute.side_effect = [
+            [{'id': 1, 'name': 'Easy Recipe', 'desc': '', 'time': 30, 'skill': 'beginner', 'serving': 2}],
+            [{'r_id': 1, 'name': 'chicken'}],  # recipe ingredients
+            []  # equipment
         ]
         
         filters = {'skill_level': 'beginner'}
@@ -188,7 +222,7 @@ class TestQueryRecipesByIngredients:
 class TestQueryUserFavorites:
     """Test user favorites queries"""
     
-    @patch('queries.query_handlers.query_user_pantry')
+    @patch('queries.query_handlers.query_user_pantry_names')
     @patch('queries.query_handlers.query_recipe_by_id')
     @patch('queries.query_handlers.execute_query')
     def test_query_favorites_with_match_calculation(self, mock_execute, mock_recipe, mock_pantry):
@@ -196,10 +230,7 @@ class TestQueryUserFavorites:
         mock_execute.return_value = [
             {'id': 1, 'name': 'Favorite Recipe'}
         ]
-        mock_pantry.return_value = [
-            {'name': 'chicken'},
-            {'name': 'rice'}
-        ]
+        mock_pantry.return_value = frozenset({'chicken', 'rice'})
         mock_recipe.return_value = {
             'ingredients': ['chicken', 'rice', 'soy sauce']
         }
@@ -221,14 +252,11 @@ class TestQueryUserFavorites:
 class TestQueryShoppingSuggestions:
     """Test shopping suggestion queries"""
     
-    @patch('queries.query_handlers.query_user_pantry')
+    @patch('queries.query_handlers.query_user_pantry_names')
     @patch('queries.query_handlers.query_recipes_by_ingredients')
     def test_shopping_suggestions(self, mock_search, mock_pantry):
         """Test generating shopping suggestions"""
-        mock_pantry.return_value = [
-            {'name': 'chicken'},
-            {'name': 'rice'}
-        ]
+        mock_pantry.return_value = frozenset({'chicken', 'rice'})
         mock_search.return_value = [
             {
                 'id': 1,
@@ -250,12 +278,33 @@ class TestQueryShoppingSuggestions:
         
         # soy sauce should be ranked high (appears in 2 recipes)
         assert len(result) > 0
+        assert result[0]['name'] == 'soy sauce'
+        assert result[0]['unlock_count'] == 2
     
-    @patch('queries.query_handlers.query_user_pantry')
+    @patch('queries.query_handlers.query_user_pantry_names')
+    @patch('queries.query_handlers.query_recipes_by_ingredients')
+    def test_shopping_suggestions_from_search_dict(self, mock_search, mock_pantry):
+        """Test suggestions use the compatible list of the search result"""
+        mock_pantry.return_value = frozenset({'chicken'})
+        mock_search.return_value = {
+            'compatible': [
+                {'id': 1, 'name': 'Recipe 1', 'match_percentage': 50.0, 'missing_ingredients': ['rice']}
+            ],
+            'filtered': [
+                {'id': 2, 'name': 'Recipe 2', 'match_percentage': 50.0, 'missing_ingredients': ['bacon']}
+            ],
+            'dietary_restrictions': []
+        }
+        
+        result = query_shopping_suggestions('user-123', {}, top_n=5)
+        
+        assert [s['name'] for s in result] == ['rice']
+    
+    @patch('queries.query_handlers.query_user_pantry_names')
     @patch('queries.query_handlers.query_recipes_by_ingredients')
     def test_shopping_suggestions_with_filters(self, mock_search, mock_pantry):
         """Test shopping suggestions with filters"""
-        mock_pantry.return_value = [{'name': 'chicken'}]
+        mock_pantry.return_value = frozenset({'chicken'})
         mock_search.return_value = []
         
         filters = {'max_time': 30}
@@ -265,6 +314,40 @@ class TestQueryShoppingSuggestions:
         assert mock_search.called
 
 
+class TestQueryTopRecipeMatches:
+    """Test top recipe match queries"""
+    
+    @patch('queries.query_handlers.execute_query')
+    @patch('queries.query_handlers.get_user_recipe_matches')
+    def test_served_from_projection(self, mock_projection, mock_execute):
+        """Test that a warm projection skips the database"""
+        mock_projection.return_value = [
+            {'id': 1, 'match_percentage': 100.0, 'matched_count': 2, 'total_count': 2}
+        ]
+        
+        result = query_top_recipe_matches('user-123', top_n=5)
+        
+        assert result[0]['id'] == 1
+        mock_projection.assert_called_once_with('user-123', 5)
+        assert not mock_execute.called
+    
+    @patch('queries.query_handlers.execute_query')
+    @patch('queries.query_handlers.get_user_recipe_matches')
+    def test_cold_projection_falls_back_to_sql(self, mock_projection, mock_execute):
+        """Test aggregate query when the projection has no data for the user"""
+        mock_projection.return_value = None
+        mock_execute.return_value = [
+            {'id': 1, 'total': 4, 'matched': 3},
+            {'id': 2, 'total': 3, 'matched': 1}
+        ]
+        
+        result = query_top_recipe_matches('user-123')
+        
+        assert result[0]['match_percentage'] == 75.0
+        assert result[1]['matched_count'] == 1
+        assert result[1]['total_count'] == 3
+
+
 class TestDietaryRestrictionFiltering:
     """Test dietary restriction filtering in queries"""
     
@@ -276,8 +359,8 @@ class TestDietaryRestrictionFiltering:
         mock_execute.side_effect = [
             {'u_id': 'user-123', 'diet': 'vegan'},  # user profile
             [{'id': 1, 'name': 'Chicken Recipe', 'time': 30, 'skill': 'beginner', 'serving': 2}],  # recipes
-            [{'name': 'chicken'}],  # recipe ingredients
-            [{'name': 'pan'}]  # equipment
+            [{'r_id': 1, 'name': 'chicken'}],  # recipe ingredients
+            [{'r_id': 1, 'name': 'pan'}]  # equipment
         ]
         mock_check.return_value = (False, [{
             'ingredient': 'chicken',
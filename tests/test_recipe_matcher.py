@@ -3,11 +3,15 @@ Tests for services.recipe_matcher module
 Tests the core recipe matching algorithm
 """
 import pytest
+from unittest.mock import patch
+from services import recipe_matcher
 from services.recipe_matcher import (
     calculate_match,
+    calculate_recipe_match,
     passes_filters,
     search_recipes,
-    find_partial_matches
+    find_partial_matches,
+    load_recipes
 )
 
 
@@ -68,6 +72,36 @@ class TestCalculateMatch:
         result = calculate_match(recipe_ingredients, user_ingredients)
         
         assert result['percentage'] == 100.0
+    
+    def test_case_insensitive_user_ingredients(self):
+        """Test that the user's ingredients are lowercased too"""
+        recipe_ingredients = ['chicken', 'rice', 'soy sauce']
+        user_ingredients = ['Chicken', 'RICE']
+        
+        result = calculate_match(recipe_ingredients, user_ingredients)
+        
+        assert result['percentage'] == 66.7
+        assert result['matched'] == ['chicken', 'rice']
+        assert result['missing'] == ['soy sauce']
+    
+    def test_recipe_match_lowercases_user_ingredients(self, sample_recipe):
+        """Test scoring a recipe dict is case-insensitive on the user side too"""
+        sample_recipe['ingredients'] = ['chicken', 'rice', 'soy sauce']
+        
+        result = calculate_recipe_match(sample_recipe, ['Chicken', 'RICE'])
+        
+        assert result['matched'] == ['chicken', 'rice']
+        assert result['missing'] == ['soy sauce']
+    
+    def test_recipe_match_uses_lowercased_ingredients(self, sample_recipe):
+        """Test scoring a recipe dict matches calculate_match on its ingredients"""
+        sample_recipe['ingredients'] = ['Chicken', 'RICE', 'soy sauce', 'garlic']
+        user_ingredients = frozenset(['chicken', 'rice'])
+        
+        result = calculate_recipe_match(sample_recipe, user_ingredients)
+        
+        assert result == calculate_match(sample_recipe['ingredients'], user_ingredients)
+        assert result['matched'] == ['chicken', 'rice']
 
 
 class TestPassesFilters:
@@ -190,6 +224,112 @@ class TestSearchRecipes:
         results = search_recipes(user_ingredients, sample_recipes)
         
         assert len(results) == 0
+    
+    def test_search_top_n(self, sample_recipes, user_ingredients):
+        """Test that top_n returns only the best matches, in order"""
+        full = search_recipes(user_ingredients, sample_recipes)
+        results = search_recipes(user_ingredients, sample_recipes, top_n=1)
+        
+        assert len(results) == 1
+        assert results[0]['id'] == full[0]['id']
+    
+    def test_parallel_search_matches_sequential(self, sample_recipes, user_ingredients):
+        """Test that sharding across worker processes gives the same results"""
+        expected = search_recipes(user_ingredients, sample_recipes)
+        
+        with patch('services.recipe_matcher.PARALLEL_MIN_RECIPES', 1):
+            results = search_recipes(user_ingredients, sample_recipes)
+        
+        assert results == expected
+    
+    def test_indexed_catalogue_matches_full_scan(self):
+        """Test that the inverted index over the catalogue finds the same recipes"""
+        catalogue = load_recipes()
+        user_ingredients = ['eggs', 'butter', 'garlic']
+        
+        # a copy of the list isn't indexed, so it is scanned in full
+        assert search_recipes(user_ingredients, catalogue) == search_recipes(user_ingredients, list(catalogue))
+        assert (find_partial_matches(user_ingredients, catalogue, min_match_threshold=10)
+                == find_partial_matches(user_ingredients, list(catalogue), min_match_threshold=10))
+    
+    def test_repeated_catalogue_search_is_cached(self):
+        """Test that repeating a catalogue search reuses the first result"""
+        catalogue = load_recipes()
+        user_ingredients = ['garlic', 'eggs']
+        
+        first = search_recipes(user_ingredients, catalogue, {'max_time': 45})
+        with patch('services.recipe_matcher._score_recipes') as mock_score:
+            second = search_recipes(['eggs', 'garlic'], catalogue, {'max_time': 45})
+        
+        assert second == first
+        assert not mock_score.called
+    
+    def test_search_is_case_insensitive(self, sample_recipes):
+        """Test that capitalised user ingredients find the same recipes"""
+        catalogue = load_recipes()
+        
+        assert search_recipes(['Chicken', 'RICE'], sample_recipes) == search_recipes(['chicken', 'rice'], sample_recipes)
+        assert search_recipes(['Garlic', 'EGGS'], catalogue) == search_recipes(['garlic', 'eggs'], catalogue)
+        assert search_recipes(['Chicken', 'RICE'], sample_recipes)
+    
+    def test_partial_matches_are_case_insensitive(self, sample_recipes):
+        """Test that capitalised user ingredients give the same partial matches"""
+        catalogue = load_recipes()
+        
+        assert find_partial_matches(['Chicken'], sample_recipes, min_match_threshold=10) == find_partial_matches(['chicken'], sample_recipes, min_match_threshold=10)
+        assert find_partial_matches(['GARLIC'], catalogue, min_match_threshold=10) == find_partial_matches(['garlic'], catalogue, min_match_threshold=10)
+    
+    def test_cached_search_results_are_copies(self):
+        """Test that editing one search's results doesn't change the next identical search"""
+        catalogue = load_recipes()
+        user_ingredients = ['garlic', 'eggs']
+        
+        results = search_recipes(user_ingredients, catalogue)
+        expected = search_recipes(user_ingredients, list(catalogue))
+        results[0]['matched_ingredients'].append('unicorn')
+        results[0]['name'] = 'changed'
+        
+        assert search_recipes(user_ingredients, catalogue) == expected
+    
+    def test_catalogue_search_with_unhashable_unknown_filter(self):
+        """Test that an unhashable value under an unknown filter name doesn't break the cache"""
+        catalogue = load_recipes()
+        user_ingredients = ['garlic', 'eggs']
+        filters = {'cuisine': 'italian', 'extra': {'a': 1}}
+        
+        assert search_recipes(user_ingredients, catalogue, filters) == search_recipes(user_ingredients, list(catalogue), filters)
+    
+    def test_cached_catalogue_filters_match_full_scan(self):
+        """Test that cached filter results on the catalogue match per-recipe filtering"""
+        catalogue = load_recipes()
+        user_ingredients = ['eggs', 'butter', 'garlic']
+        filters = {'max_time': 30, 'dietary_tags': ['vegetarian']}
+        
+        # run twice so the second search reads the cached filter result
+        for _ in range(2):
+            assert (search_recipes(user_ingredients, catalogue, filters)
+                    == search_recipes(user_ingredients, list(catalogue), filters))
+            assert (find_partial_matches(user_ingredients, catalogue, filters, min_match_threshold=0)
+                    == find_partial_matches(user_ingredients, list(catalogue), filters, min_match_threshold=0))
+    
+    def test_catalogue_filters_ignore_unknown_unhashable_keys(self):
+        """Test that an unknown filter with an unhashable value is ignored, not a crash"""
+        catalogue = load_recipes()
+        user_ingredients = ['eggs', 'butter', 'garlic']
+        filters = {'cuisine': 'italian', 'extra': {'a': 1}}
+        
+        assert (find_partial_matches(user_ingredients, catalogue, filters, min_match_threshold=0)
+                == find_partial_matches(user_ingredients, list(catalogue), {'cuisine': 'italian'}, min_match_threshold=0))
+    
+    def test_catalogue_filter_cache_is_bounded(self):
+        """Test that distinct filter sets don't grow the filter cache past its size"""
+        catalogue = load_recipes()
+        
+        with patch('services.recipe_matcher.FILTER_CACHE_SIZE', 2):
+            for max_time in (11, 12, 13, 14):
+                find_partial_matches(['eggs'], catalogue, {'max_time': max_time}, min_match_threshold=0)
+            
+            assert len(recipe_matcher._filter_cache) <= 2
 
 
 class TestFindPartialMatches:
@@ -8,12 +8,38 @@ from services.substitutions import (
 )
 
 
+def _names_blob(subs):
+    """Lowercased substitute names joined into one string for substring checks"""
+    return ' | '.join(s['name'].lower() for s in subs)
+
+
+# each common lookup is made once per module; tuples so tests can't mutate them
+@pytest.fixture(scope="module")
+def milk_vegan_subs():
+    return tuple(get_substitutions_for_ingredient('milk', ['vegan']))
+
+
+@pytest.fixture(scope="module")
+def butter_dairy_free_subs():
+    return tuple(get_substitutions_for_ingredient('butter', ['dairy-free']))
+
+
+@pytest.fixture(scope="module")
+def flour_gluten_free_subs():
+    return tuple(get_substitutions_for_ingredient('flour', ['gluten-free']))
+
+
+@pytest.fixture(scope="module")
+def chicken_vegetarian_subs():
+    return tuple(get_substitutions_for_ingredient('chicken', ['vegetarian']))
+
+
 class TestGetSubstitutionsForIngredient:
     """Test getting substitutions for specific ingredients"""
     
-    def test_milk_substitutions_vegan(self):
+    def test_milk_substitutions_vegan(self, milk_vegan_subs):
         """Test getting vegan milk substitutions"""
-        subs = get_substitutions_for_ingredient('milk', ['vegan'])
+        subs = milk_vegan_subs
         
         # Should have at least one vegan milk substitute
         assert len(subs) > 0
@@ -23,9 +49,9 @@ class TestGetSubstitutionsForIngredient:
             assert 'vegan' in sub['best_for']
             assert 'milk' in sub['name'].lower()
     
-    def test_butter_substitutions_dairy_free(self):
+    def test_butter_substitutions_dairy_free(self, butter_dairy_free_subs):
         """Test getting dairy-free butter substitutions"""
-        subs = get_substitutions_for_ingredient('butter', ['dairy-free'])
+        subs = butter_dairy_free_subs
         
         assert len(subs) > 0
         for sub in subs:
@@ -37,12 +63,11 @@ class TestGetSubstitutionsForIngredient:
         
         assert len(subs) > 0
         # Common vegan egg subs
-        sub_names = [s['name'] for s in subs]
-        assert any('flax' in name.lower() for name in sub_names)
+        assert 'flax' in _names_blob(subs)
     
-    def test_flour_substitutions_gluten_free(self):
+    def test_flour_substitutions_gluten_free(self, flour_gluten_free_subs):
         """Test getting gluten-free flour substitutions"""
-        subs = get_substitutions_for_ingredient('flour', ['gluten-free'])
+        subs = flour_gluten_free_subs
         
         assert len(subs) > 0
         for sub in subs:
@@ -54,19 +79,26 @@ class TestGetSubstitutionsForIngredient:
         
         # Should get oat milk or soy milk (but not almond milk)
         assert len(subs) > 0
-        sub_names = [s['name'].lower() for s in subs]
         
         # Shouldn't include almond milk (has nuts)
-        assert not any('almond' in name for name in sub_names)
+        assert 'almond' not in _names_blob(subs)
     
-    def test_case_insensitive_ingredient(self):
+    def test_case_insensitive_ingredient(self, milk_vegan_subs):
         """Test that ingredient matching is case-insensitive"""
-        subs_lower = get_substitutions_for_ingredient('milk', ['vegan'])
+        subs_lower = milk_vegan_subs
         subs_upper = get_substitutions_for_ingredient('MILK', ['vegan'])
         subs_mixed = get_substitutions_for_ingredient('Milk', ['vegan'])
         
         assert len(subs_lower) == len(subs_upper) == len(subs_mixed)
     
+    def test_restriction_order_does_not_matter(self):
+        """Test that the same restrictions in any order give the same substitutes"""
+        subs = get_substitutions_for_ingredient('milk', ['vegan', 'nut-free'])
+        
+        assert subs == get_substitutions_for_ingredient('milk', ('nut-free', 'vegan'))
+        # each call gets its own list
+        assert subs is not get_substitutions_for_ingredient('milk', ['vegan', 'nut-free'])
+    
     def test_unknown_ingredient(self):
         """Test handling of unknown ingredients"""
         subs = get_substitutions_for_ingredient('unicorn_tears', ['vegan'])
@@ -83,50 +115,52 @@ class TestGetSubstitutionsForIngredient:
         assert isinstance(subs, list)
 
 
+# every (ingredient, substitute) pair with its test id, collected in one pass
+# over SUBSTITUTIONS when pytest imports this module
+ALL_SUBS = [
+    pytest.param(ingredient, substitute, id=f"{ingredient}-{substitute.get('name')}")
+    for ingredient, data in SUBSTITUTIONS.items()
+    for substitute in data['substitutes']
+]
+
+REQUIRED_FIELDS = frozenset({'name', 'ratio', 'best_for', 'flavor_impact',
+                             'texture_impact', 'cooking_notes'})
+
+
 class TestSubstitutionDataStructure:
     """Test that substitution data is properly structured"""
     
-    def test_all_required_fields_present(self):
-        """Test that all substitutes have required fields"""
-        required_fields = ['name', 'ratio', 'best_for', 'flavor_impact', 
-                          'texture_impact', 'cooking_notes']
-        
-        for ingredient, data in SUBSTITUTIONS.items():
-            for substitute in data['substitutes']:
-                for field in required_fields:
-                    assert field in substitute, \
-                        f"Missing {field} in {substitute['name']} for {ingredient}"
-    
-    def test_ratios_are_strings(self):
-        """Test that all ratios are formatted as strings"""
-        for ingredient, data in SUBSTITUTIONS.items():
-            for substitute in data['substitutes']:
-                assert isinstance(substitute['ratio'], str)
-                assert len(substitute['ratio']) > 0  # Just check it's not empty
-    
-    def test_best_for_is_list(self):
-        """Test that best_for is always a list"""
-        for ingredient, data in SUBSTITUTIONS.items():
-            for substitute in data['substitutes']:
-                assert isinstance(substitute['best_for'], list)
-                assert len(substitute['best_for']) > 0
+    @pytest.mark.parametrize("ingredient, substitute", ALL_SUBS)
+    def test_substitute_shape(self, ingredient, substitute):
+        """Test required fields, string ratio and non-empty best_for list in one pass"""
+        missing = REQUIRED_FIELDS - substitute.keys()
+        assert not missing, \
+            f"Missing {sorted(missing)} in {substitute.get('name')} for {ingredient}"
+        
+        # ratios are formatted as non-empty strings
+        assert isinstance(substitute['ratio'], str)
+        assert len(substitute['ratio']) > 0
+        
+        # best_for is always a non-empty list
+        assert isinstance(substitute['best_for'], list)
+        assert len(substitute['best_for']) > 0
 
 
 class TestCommonSubstitutions:
     """Test common substitution scenarios"""
     
-    def test_vegetarian_gets_dairy_substitutes(self):
+    def test_vegetarian_gets_dairy_substitutes(self, chicken_vegetarian_subs):
         """Test that vegetarian restrictions don't filter out dairy"""
-        subs = get_substitutions_for_ingredient('chicken', ['vegetarian'])
+        subs = chicken_vegetarian_subs
         
         # Should get tofu, chickpeas, seitan
         assert len(subs) > 0
         sub_names = [s['name'] for s in subs]
         assert 'tofu' in sub_names
     
-    def test_vegan_gets_stricter_substitutes(self):
+    def test_vegan_gets_stricter_substitutes(self, milk_vegan_subs):
         """Test that vegan restrictions filter more strictly"""
-        milk_subs = get_substitutions_for_ingredient('milk', ['vegan'])
+        milk_subs = milk_vegan_subs
         
         # Should NOT get regular dairy products
         sub_names = [s['name'] for s in milk_subs]  # FIXED: was 'subs'
@@ -137,5 +171,4 @@ class TestCommonSubstitutions:
         milk_subs = get_substitutions_for_ingredient('milk', ['nut-free'])
         
         # Should not include almond milk
-        sub_names = [s['name'].lower() for s in milk_subs]
-        assert not any('almond' in name for name in sub_names)
\ No newline at end of file
+        assert 'almond' not in _names_blob(milk_subs)
\ No newline at end of file
@@ -3,10 +3,6 @@ Unit Tests for Shopping Suggestion Engine
 Tests the smart shopping suggestion algorithm
 """
 import pytest
-import sys
-import os
-
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from services.suggestion_engine import generate_shopping_suggestions, display_suggestions
@@ -77,6 +73,23 @@ class TestGenerateShoppingSuggestions:
         
         assert len(suggestions) > 0
     
+    def test_no_matches_is_case_insensitive(self):
+        """Test that a capitalised pantry ingredient isn't suggested as a purchase"""
+        recipes = [
+            {
+                'id': 1,
+                'name': 'Simple Recipe',
+                'ingredients': ['chicken', 'salt'],
+                'total_time': 15,
+                'skill_level': 'beginner',
+                'cuisine': 'American'
+            }
+        ]
+        
+        suggestions = generate_shopping_suggestions(['Chicken'], recipes, top_n=5, has_matches=False)
+        
+        assert [s['name'] for s in suggestions] == ['salt']
+    
     def test_top_n_limit(self):
         """Test that suggestions are limited to top_n"""
         user_ingredients = ['chicken']
@@ -0,0 +1,39 @@
+# Pooled UUID4 generation
+# pulls random bytes from os.urandom in bulk instead of 16 bytes per id
+
+import os
+import threading
+
+_POOL_SIZE = 16 * 256
+
+_pool = b''
+_offset = _POOL_SIZE
+_lock = threading.Lock()
+
+def _reset_pool() -> None:
+    # a forked child must not hand out the same bytes as its parent
+    global _pool, _offset
+    _pool = b''
+    _offset = _POOL_SIZE
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pool)
+
+def new_uuid4_str() -> str:
+    # returns a random (version 4) UUID string, same format as str(uuid.uuid4())
+    global _pool, _offset
+
+    with _lock:
+        if _offset >= _POOL_SIZE:
+            # refill the whole pool with one syscall
+            _pool = os.urandom(_POOL_SIZE)
+            _offset = 0
+        b = bytearray(_pool[_offset:_offset + 16])
+        _offset += 16
+
+    # set version (4) and variant (RFC 4122) bits
+    b[6] = (b[6] & 0x0f) | 0x40
+    b[8] = (b[8] & 0x3f) | 0x80
+
+    h = b.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
@@ -0,0 +1,31 @@
+# Logging setup
+# log records are pushed onto a queue and written to stderr by a background
+# thread, so publishers never block on the stream lock or a write() syscall
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+_listener = None
+
+def setup_logging(level: str = None) -> None:
+    # route the root logger through a QueueHandler + QueueListener (idempotent)
+    global _listener
+
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(levelname)s %(name)s: %(message)s'))
+
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level or os.environ.get('LOG_LEVEL', 'INFO'))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+    atexit.register(_listener.stop)